@@ -2,16 +2,20 @@ import math
 from typing import Dict, Optional, List
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from loguru import logger
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status
 
 from models.user import User
 from core.security import get_current_user
+from core.etag import make_etag, is_not_modified, not_modified_response, set_etag
+from services.cache_service import get_article_generation
 from services.article_service import (
     get_user_articles,
     get_article_detail,
+    get_article_version,
     update_article_status,
+    update_articles_status_bulk,
     mark_all_articles_as_read,
     search_user_articles,
 )
@@ -27,6 +31,16 @@ class ArticleStatusUpdate(BaseModel):
     read_position: Optional[int] = None
 
 
+class BulkArticleStatusItem(ArticleStatusUpdate):
+    """批量更新中单篇文章的状态变更。"""
+    article_id: int
+
+
+class BulkArticleStatusUpdate(BaseModel):
+    """批量更新文章状态的请求体模型。"""
+    items: List[BulkArticleStatusItem] = Field(..., min_length=1, max_length=500)
+
+
 class ArticleResponse(BaseModel):
     """单个文章的响应模型，包含用户交互状态。"""
     id: int
@@ -35,6 +49,8 @@ class ArticleResponse(BaseModel):
     author: Optional[str] = None
     summary: Optional[str] = None
     content: Optional[str] = None
+    excerpt: Optional[str] = None
+    snippet: Optional[str] = None  # 搜索结果中高亮后的匹配片段（已转义的HTML）
     image_url: Optional[str] = None
     published_at: Optional[datetime] = None
     feed_id: int
@@ -47,17 +63,74 @@ class ArticleResponse(BaseModel):
     updated_at: datetime
 
 
+class ArticleListItem(BaseModel):
+    """
+    文章列表项的响应模型。使用列表模式或字段投影时只返回请求的字段，因此除 id 外均为可选。
+    """
+    id: int
+    title: Optional[str] = None
+    url: Optional[str] = None
+    author: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    image_url: Optional[str] = None
+    published_at: Optional[datetime] = None
+    guid: Optional[str] = None
+    feed_id: Optional[int] = None
+    feed_title: Optional[str] = None
+    is_read: Optional[bool] = None
+    is_favorite: Optional[bool] = None
+    read_later: Optional[bool] = None
+    read_position: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class PaginatedArticleListResponse(BaseModel):
+    """
+    文章列表的分页响应模型，列表项只包含请求的字段。
+    使用游标分页或未请求总数时，total/page/total_pages 为空；next_cursor 可用于获取下一页。
+    """
+    data: List[ArticleListItem]
+    total: Optional[int] = None
+    page: Optional[int] = None
+    total_pages: Optional[int] = None
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
 class PaginatedArticleResponse(BaseModel):
-    """文章列表的分页响应模型。"""
+    """
+    文章列表的分页响应模型。
+    使用游标分页或未请求总数时，total/page/total_pages 为空；next_cursor 可用于获取下一页。
+    """
     data: List[ArticleResponse]
-    total: int
-    page: int
-    total_pages: int
+    total: Optional[int] = None
+    page: Optional[int] = None
+    total_pages: Optional[int] = None
     has_more: bool
+    next_cursor: Optional[str] = None
+
+
+def build_page(articles: List[Dict], total: Optional[int], next_cursor: Optional[str], skip: int, limit: int, cursor: Optional[str]) -> Dict:
+    """根据分页方式构造分页响应数据。"""
+    page = None if cursor else (skip // limit) + 1
+    total_pages = math.ceil(total / limit) if total is not None else None
+    return {
+        "data": articles,
+        "total": total,
+        "page": page,
+        "total_pages": total_pages,
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
+    }
 
 
-@router.get("", response_model=PaginatedArticleResponse, summary="获取文章列表")
+@router.get("", response_model=PaginatedArticleListResponse, response_model_exclude_unset=True, summary="获取文章列表")
 async def list_articles(
+        request: Request,
+        response: Response,
         skip: int = Query(0, ge=0, description="分页偏移量"),
         limit: int = Query(20, ge=1, le=100, description="每页数量"),
         feed_id: Optional[int] = Query(None, description="按特定订阅源ID过滤"),
@@ -65,35 +138,51 @@ async def list_articles(
         is_favorite: Optional[bool] = Query(None, description="按收藏状态过滤"),
         read_later: Optional[bool] = Query(None, description="按稍后读状态过滤"),
         sort_by: str = Query("published_at", description="排序字段，如 'published_at'"),
+        sort_order: str = Query("desc", description="排序方向：'desc' 从新到旧，'asc' 从旧到新"),
+        cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，提供时忽略 skip"),
+        with_total: bool = Query(True, description="是否返回符合条件的总数"),
+        view: str = Query("full", description="'full' 返回完整文章，'list' 只返回列表展示所需的字段"),
+        fields: Optional[str] = Query(None, description="逗号分隔的返回字段，如 'id,title,excerpt'，提供时优先于 view"),
         current_user: User = Depends(get_current_user),
 ):
     """
     获取当前用户的文章列表，支持丰富的过滤、排序和分页功能。
+    支持偏移量分页和基于 (排序字段, id) 的游标分页，无限滚动时推荐使用游标并关闭总数统计。
+    列表页推荐使用 view=list，只查询和返回标题、摘录、图片等字段，不传输正文。
+    ETag由用户的文章缓存代数和查询参数计算，内容未变化时直接返回304。
     所有业务逻辑已移至服务层。
     """
-    articles, total = await get_user_articles(
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        feed_id=feed_id,
-        is_read=is_read,
-        is_favorite=is_favorite,
-        read_later=read_later,
-        sort_by=sort_by,
-    )
+    generation = await get_article_generation(current_user.id)
+    etag = None
+    if generation is not None:
+        etag = make_etag("articles", current_user.id, generation, sorted(request.query_params.multi_items()))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
 
-    total_pages = math.ceil(total / limit) if limit > 0 else 0
-    page = (skip // limit) + 1 if limit > 0 else 1
+    try:
+        articles, total, next_cursor = await get_user_articles(
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            feed_id=feed_id,
+            is_read=is_read,
+            is_favorite=is_favorite,
+            read_later=read_later,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            include_total=with_total,
+            view=view,
+            fields=fields,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     logger.success(f"用户 {current_user.id} 请求文章列表，找到 {total} 篇文章。")
+    if etag:
+        set_etag(response, etag)
 
-    return {
-        "data": articles,
-        "total": total,
-        "page": page,
-        "total_pages": total_pages,
-        "has_more": page < total_pages,
-    }
+    return build_page(articles, total, next_cursor, skip, limit, cursor)
 
 
 @router.get("/search", response_model=PaginatedArticleResponse, summary="搜索文章")
@@ -101,47 +190,79 @@ async def search_articles(
         q: str = Query(..., min_length=1, max_length=100, description="搜索关键词"),
         skip: int = Query(0, ge=0, description="分页偏移量"),
         limit: int = Query(20, ge=1, le=100, description="每页数量"),
+        cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，提供时忽略 skip"),
+        with_total: bool = Query(True, description="是否返回符合条件的总数"),
         current_user: User = Depends(get_current_user),
 ):
     """
     根据关键词在当前用户订阅的所有文章中进行全文搜索。
+    每条结果返回高亮的匹配片段 snippet 和纯文本摘录 excerpt，不包含摘要和正文，正文请通过 GET /api/articles/{id} 获取。
     """
     if not q.strip():
         logger.warning(f"用户 {current_user.id} 搜索关键词为空，请求被拒绝。")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="搜索关键词不能为空")
 
-    articles, total = await search_user_articles(user_id=current_user.id, query=q, skip=skip, limit=limit)
-    total_pages = math.ceil(total / limit) if limit > 0 else 0
-    page = (skip // limit) + 1 if limit > 0 else 1
+    try:
+        articles, total, next_cursor = await search_user_articles(
+            user_id=current_user.id, query=q, skip=skip, limit=limit, cursor=cursor, include_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     logger.success(f"用户 {current_user.id} 搜索关键词 '{q}' 找到 {total} 篇文章。")
-    return {
-        "data": articles,
-        "total": total,
-        "page": page,
-        "total_pages": total_pages,
-        "has_more": page < total_pages,
-    }
+    return build_page(articles, total, next_cursor, skip, limit, cursor)
 
 
 @router.get("/{article_id}", response_model=ArticleResponse, summary="获取单篇文章详情")
 async def read_article(
+        request: Request,
+        response: Response,
         article_id: int,
         current_user: User = Depends(get_current_user)
 ):
     """
     获取指定ID的单篇文章详情，包括其内容和用户交互状态。
     如果用户首次查看，文章会自动标记为已读。
+    ETag由文章和交互记录的更新时间计算，内容未变化时不加载正文直接返回304。
     """
+    if request.headers.get("if-none-match"):
+        version = await get_article_version(article_id, current_user.id)
+        if version:
+            etag = make_etag("article", article_id, current_user.id, *version)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
     article = await get_article_detail(article_id=article_id, user_id=current_user.id)
     if not article:
         logger.warning(f"用户 {current_user.id} 请求的文章 (ID: {article_id}) 未找到或无权访问。")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="文章不存在或没有权限查看")
 
+    # 首次查看会自动标记为已读并更新交互记录，因此在获取详情之后重新计算版本
+    version = await get_article_version(article_id, current_user.id)
+    if version:
+        set_etag(response, make_etag("article", article_id, current_user.id, *version))
+
     logger.success(f"用户 {current_user.id} 请求文章 (ID: {article_id}) 详情。")
     return article
 
 
+@router.patch("/status", response_model=Dict, summary="批量更新文章状态")
+async def bulk_update_article_status_endpoint(
+        status_update: BulkArticleStatusUpdate,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    批量更新多篇文章的用户特定状态，如在列表中选中多篇文章后全部标记为已读或收藏。
+    所有变更在一个事务中写入；不存在或无权访问的文章ID会在 not_found 中返回。
+    """
+    result = await update_articles_status_bulk(
+        user_id=current_user.id,
+        updates=[item.model_dump() for item in status_update.items]
+    )
+    logger.success(f"用户 {current_user.id} 批量更新了 {result['updated']} 篇文章的状态。")
+    return result
+
+
 @router.patch("/{article_id}/status", response_model=Dict, summary="更新文章状态")
 async def update_article_status_endpoint(
         article_id: int,
@@ -1,19 +1,22 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, HttpUrl
 from arq.connections import ArqRedis
 from loguru import logger
 
 from models import User, FeedCategory
 from core.security import get_current_user
+from core.etag import make_etag, is_not_modified, not_modified_response, set_etag
 from services.feed_service import (
     get_user_feeds,
+    get_user_feeds_version,
     get_feed,
     create_feed,
     delete_feed
 )
+from services.counter_service import get_feed_counters, summarize_counters
 
 router = APIRouter()
 
@@ -46,6 +49,30 @@ class UserFeedResponse(BaseModel):
     feed_website_url: Optional[str] = None
     feed_image_url: Optional[str] = None
     feed_last_fetched: Optional[datetime] = None
+    unread_count: int = 0
+    favorite_count: int = 0
+
+
+class FeedCounter(BaseModel):
+    """单个订阅的计数器"""
+    feed_id: int
+    category: FeedCategory
+    unread_count: int
+    favorite_count: int
+
+
+class CategoryCounter(BaseModel):
+    """单个分类的计数器合计"""
+    unread_count: int
+    favorite_count: int
+
+
+class FeedCountsResponse(BaseModel):
+    """订阅计数器响应模型，用于侧边栏角标"""
+    feeds: List[FeedCounter]
+    categories: Dict[FeedCategory, CategoryCounter]
+    total_unread: int
+    total_favorite: int
 
 
 class FeedCreate(BaseModel):
@@ -57,13 +84,22 @@ class FeedCreate(BaseModel):
 
 @router.get("", response_model=List[UserFeedResponse])
 async def read_feeds(
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     获取当前认证用户的所有订阅源。
+    ETag由订阅和Feed的更新时间及计数器计算，内容未变化时不加载完整记录直接返回304。
     """
+    version = await get_user_feeds_version(current_user.id)
+    etag = make_etag("feeds", current_user.id, skip, limit, version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+
     user_feeds = await get_user_feeds(current_user.id)
 
     # 手动构建包含完整Feed信息的响应模型列表
@@ -83,7 +119,9 @@ async def read_feeds(
                 feed_description=feed.description,
                 feed_website_url=feed.website_url,
                 feed_image_url=feed.image_url,
-                feed_last_fetched=feed.last_fetched
+                feed_last_fetched=feed.last_fetched,
+                unread_count=user_feed.unread_count,
+                favorite_count=user_feed.favorite_count
             )
         )
 
@@ -91,6 +129,18 @@ async def read_feeds(
     return result
 
 
+@router.get("/counts", response_model=FeedCountsResponse)
+async def read_feed_counts(
+        current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    获取当前用户每个订阅、每个分类以及全部订阅的未读数和收藏数。
+    计数器在入库和状态变更时增量维护，此接口只读取订阅表。
+    """
+    counters = await get_feed_counters(current_user.id)
+    return summarize_counters(counters)
+
+
 @router.post("", response_model=FeedResponse, status_code=status.HTTP_202_ACCEPTED)
 async def add_feed_subscription(
         request: Request,
@@ -154,10 +204,12 @@ async def read_feed(
 @router.delete("/{feed_id}", status_code=status.HTTP_200_OK)
 async def remove_feed(
         feed_id: int,
+        request: Request,
         current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     为当前用户取消订阅一个Feed源。
+    订阅立即移除，该Feed下的阅读记录在后台分批清理。
     """
     deleted = await delete_feed(feed_id, current_user.id)
     if not deleted:
@@ -166,6 +218,8 @@ async def remove_feed(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="取消订阅失败：您未订阅此Feed。"
         )
+    arq_pool: ArqRedis = request.app.state.arq_pool
+    await arq_pool.enqueue_job("purge_feed_interactions_task", user_id=current_user.id, feed_id=feed_id)
     logger.success(f"用户 {current_user.id} 已成功取消订阅Feed ID {feed_id}。")
     return {"message": "已成功取消订阅"}
 
@@ -1,11 +1,12 @@
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field, model_validator, ConfigDict
 from loguru import logger
 
 from models.user import User
 from core.security import get_current_user
+from core.etag import make_etag, is_not_modified, not_modified_response, set_etag
 
 router = APIRouter()
 
@@ -34,10 +35,20 @@ class UserPreferences(BaseModel):
 
 
 @router.get("", response_model=UserPreferences, summary="获取用户偏好设置")
-async def get_user_preferences(current_user: User = Depends(get_current_user)) -> UserPreferences:
+async def get_user_preferences(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user)
+) -> Any:
     """
     获取当前登录用户的偏好设置。
+    ETag由用户记录的更新时间计算，偏好未变化时返回304。
     """
+    etag = make_etag("preferences", current_user.id, current_user.updated_at)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_etag(response, etag)
+
     logger.info(f"用户 [{current_user.email}] 获取偏好设置")
     return UserPreferences.model_validate(current_user)
 
@@ -1,7 +1,8 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, EmailStr
+from arq.connections import ArqRedis
 from loguru import logger
 
 from models.user import User, User_Pydantic
@@ -65,12 +66,16 @@ async def update_current_user_info(
 
 
 @router.delete("/me", summary="注销当前用户")
-async def delete_current_user(current_user: User = Depends(get_current_user)):
+async def delete_current_user(request: Request, current_user: User = Depends(get_current_user)):
     """
     注销当前用户。
 
-    使用物理删除清除与用户相关的一切数据，包括用户的订阅，文章，偏好设置等。
+    用户立即被停用，之后的请求和WebSocket连接都会被拒绝；
+    与用户相关的一切数据（订阅、文章交互记录、偏好设置等）由后台任务分批物理删除。
     """
-    await current_user.delete()
-    logger.success(f"用户 [{current_user.email}] 已成功注销.")
+    current_user.is_active = False
+    await current_user.save(update_fields=["is_active", "updated_at"])
+    arq_pool: ArqRedis = request.app.state.arq_pool
+    await arq_pool.enqueue_job("purge_user_task", user_id=current_user.id)
+    logger.success(f"用户 [{current_user.email}] 已成功注销，数据将在后台清理.")
     return {"message": "用户已成功注销"}
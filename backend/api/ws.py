@@ -1,52 +1,213 @@
 import uuid
-from typing import Dict, Any
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter
+import json
+import asyncio
+from typing import Dict, Any, Callable, Iterable, Optional
+from fastapi import WebSocket, WebSocketDisconnect, APIRouter, status
 from loguru import logger
 
+from core.config import settings
+from core.redis import get_redis
 from core.security import get_current_user_from_token
 
 router = APIRouter()
 
+# 跨进程推送WebSocket事件的Redis频道
+WS_EVENTS_CHANNEL = "ws:events"
+# 订阅频道断开后重新连接的等待时间（秒）
+WS_LISTENER_RETRY_DELAY = 1
+
+
+class ClientConnection:
+    """
+    单个WebSocket连接及其发送队列。
+    消息先放入有界队列，由独立的写入任务逐条发送，慢速客户端不会阻塞其他连接的投递。
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: int, conn_id: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.conn_id = conn_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+        # 关闭底层连接的任务，保存引用避免任务在执行前被垃圾回收
+        self.closer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def start(self, on_close: Callable[["ClientConnection"], None]):
+        """启动写入任务。"""
+        self.writer = asyncio.create_task(self._write_loop(on_close))
+
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        """
+        将消息放入发送队列，不等待发送完成。
+        队列已满时按 WS_SLOW_CONSUMER_POLICY 丢弃最旧的消息或断开连接。
+
+        Returns:
+            消息是否已放入队列。
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if settings.WS_SLOW_CONSUMER_POLICY == "disconnect":
+            logger.warning(f"WebSocket连接 [{self.user_id}-{self.conn_id}] 发送队列已满，断开慢速客户端.")
+            self.close()
+            return False
+
+        self.queue.get_nowait()
+        self.queue.put_nowait(message)
+        logger.debug(f"WebSocket连接 [{self.user_id}-{self.conn_id}] 发送队列已满，丢弃最旧的消息.")
+        return True
+
+    async def _write_loop(self, on_close: Callable[["ClientConnection"], None]):
+        """逐条发送队列中的消息，发送超时或失败时关闭连接。"""
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_json(message), timeout=settings.WS_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(f"WebSocket连接 [{self.user_id}-{self.conn_id}] 发送超时，连接已关闭.")
+            await self._close_socket()
+        except (WebSocketDisconnect, RuntimeError):
+            logger.warning(f"WebSocket连接 [{self.user_id}-{self.conn_id}] 已断开，消息已丢弃.")
+        except Exception as e:
+            # 其他发送错误同样关闭连接，客户端重连后重新同步，避免连接仍在但不再收到消息
+            logger.exception(f"WebSocket连接 [{self.user_id}-{self.conn_id}] 发送消息失败，连接已关闭: {e}")
+            await self._close_socket()
+        finally:
+            self.closed = True
+            on_close(self)
+
+    async def _close_socket(self):
+        """关闭底层连接，客户端会收到关闭帧后重新连接。"""
+        try:
+            await self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            # 关闭失败说明连接已不可用，无需处理
+            pass
+
+    async def close_with_message(self, message: Dict[str, Any]):
+        """
+        停止写入任务后发送最后一条消息并关闭连接。
+        等待写入任务结束后才发送，不会与写入任务并发写同一个连接。
+        """
+        if self.writer:
+            self.writer.cancel()
+            await asyncio.gather(self.writer, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self.websocket.send_json(message), timeout=settings.WS_SEND_TIMEOUT)
+            await self.websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except (WebSocketDisconnect, RuntimeError, asyncio.TimeoutError):
+            logger.warning(f"无法向WebSocket连接 [{self.user_id}-{self.conn_id}] 发送消息，连接已关闭.")
+
+    def close(self):
+        """停止写入任务并关闭底层连接。"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer:
+            self.writer.cancel()
+        self.closer = asyncio.create_task(self._close_socket())
+
 
 class ConnectionManager:
     """
     负责管理所有活跃的WebSocket连接。
     它按用户ID组织连接，允许向特定用户的所有会话广播消息。
+
+    连接只存在于接受它的API进程中，因此消息通过Redis频道转发：任意进程（包括arq Worker）
+    发布事件，每个API进程的监听任务再投递给本进程内该用户的连接。
+    每个连接有独立的发送队列和写入任务，投递只是入队，各连接的发送并发进行。
     """
 
     def __init__(self):
-        # 存储活动连接: {user_id: {connection_id: websocket}}
-        self.active_connections: Dict[int, Dict[str, WebSocket]] = {}
+        # 存储活动连接: {user_id: {connection_id: ClientConnection}}
+        self.active_connections: Dict[int, Dict[str, ClientConnection]] = {}
 
-    async def connect(self, websocket: WebSocket, user_id: int, conn_id: str):
-        """接受并存储一个新的WebSocket连接。"""
+    async def connect(self, websocket: WebSocket, user_id: int, conn_id: str) -> ClientConnection:
+        """接受并存储一个新的WebSocket连接，启动其写入任务。"""
         await websocket.accept()
+        connection = ClientConnection(websocket, user_id, conn_id)
+        connection.start(lambda conn: self.disconnect(conn.user_id, conn.conn_id))
         if user_id not in self.active_connections:
             self.active_connections[user_id] = {}
-        self.active_connections[user_id][conn_id] = websocket
+        self.active_connections[user_id][conn_id] = connection
         logger.info(f"用户 [{user_id}-{conn_id}] 已连接到WebSocket.")
+        return connection
 
     def disconnect(self, user_id: int, conn_id: str):
-        """移除一个已断开的WebSocket连接。"""
+        """移除一个已断开的WebSocket连接并停止其写入任务。"""
         if user_id in self.active_connections and conn_id in self.active_connections[user_id]:
-            del self.active_connections[user_id][conn_id]
+            connection = self.active_connections[user_id].pop(conn_id)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
+            # 写入任务结束时也会调用此方法，此时不能取消自身
+            if connection.writer and not connection.writer.done() and connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
             logger.info(f"用户 [{user_id}-{conn_id}] 已断开WebSocket连接.")
 
+    async def send_to_users(self, message: Dict[str, Any], user_ids: Iterable[int]):
+        """
+        向一组用户发送同一条JSON消息。只发布一次到Redis频道，由持有这些用户连接的
+        API进程投递，因此可以在任意进程中调用，调用方无需等待实际发送。
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        payload = json.dumps({"user_ids": user_ids, "message": message}, ensure_ascii=False, default=str)
+        try:
+            await get_redis().publish(WS_EVENTS_CHANNEL, payload)
+        except Exception as e:
+            logger.warning(f"发布WebSocket消息失败，消息已丢弃: {e}")
+
     async def send_personal_message(self, message: Dict[str, Any], user_id: int):
-        """向特定用户的所有活动连接发送JSON消息。"""
-        if user_id in self.active_connections:
-            # 创建副本以安全地迭代，因为disconnect会修改字典
-            connections_to_notify = list(self.active_connections[user_id].items())
-            logger.info(f"向用户 [{user_id}] 发送WebSocket消息: {message}")
+        """向特定用户发送JSON消息，可以在任意进程中调用。"""
+        await self.send_to_users(message, [user_id])
 
-            for conn_id, connection in connections_to_notify:
-                try:
-                    await connection.send_json(message)
-                except (WebSocketDisconnect, RuntimeError):
-                    logger.warning(f"WebSocket连接 [{user_id}-{conn_id}] 已断开，消息已丢弃.")
-                    self.disconnect(user_id, conn_id)
+    def send_local_message(self, message: Dict[str, Any], user_id: int) -> int:
+        """
+        将消息放入本进程内特定用户所有连接的发送队列。
+
+        Returns:
+            成功入队的连接数量。
+        """
+        # 创建副本以安全地迭代，因为入队失败可能触发断开连接
+        connections = list(self.active_connections.get(user_id, {}).values())
+        return sum(connection.enqueue(message) for connection in connections)
+
+    async def listen(self):
+        """
+        订阅Redis频道，把事件投递给本进程内的连接。
+        在API进程启动时作为后台任务运行，连接中断后自动重新订阅。
+        """
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(WS_EVENTS_CHANNEL)
+                    logger.info("已订阅WebSocket事件频道。")
+                    async for item in pubsub.listen():
+                        if item["type"] != "message":
+                            continue
+                        event = json.loads(item["data"])
+                        # 只有在本进程有连接的用户才会被投递，入队不会阻塞
+                        delivered = sum(
+                            self.send_local_message(event["message"], user_id)
+                            for user_id in event["user_ids"]
+                            if user_id in self.active_connections
+                        )
+                        if delivered:
+                            logger.debug(f"WebSocket事件 [{event['message'].get('type')}] 已投递到 {delivered} 个连接.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket事件频道订阅中断，{WS_LISTENER_RETRY_DELAY} 秒后重试: {e}")
+                await asyncio.sleep(WS_LISTENER_RETRY_DELAY)
 
 
 manager = ConnectionManager()
@@ -59,6 +220,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     处理连接认证、生命周期管理和消息收发。
     """
     conn_id = str(uuid.uuid4())
+    user = connection = None
 
     # 将连接信息绑定到日志上下文
     with logger.contextualize(conn_id=conn_id):
@@ -68,10 +230,11 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                 logger.warning("WebSocket连接失败，无效令牌.")
                 return
 
-            await manager.connect(websocket, user.id, conn_id)
+            connection = await manager.connect(websocket, user.id, conn_id)
             logger.contextualize(user_id=user.id, user_email=user.email)
 
-            await websocket.send_json(
+            # 所有发送都经过连接的发送队列，避免与写入任务并发写同一个连接
+            connection.enqueue(
                 {
                     "type": "system",
                     "code": "CONNECTION_ESTABLISHED",
@@ -84,23 +247,21 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
                 data = await websocket.receive_json()
                 logger.debug(f"从客户端接收数据: {data}")
                 if data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    connection.enqueue({"type": "pong"})
 
         except WebSocketDisconnect:
             logger.info("WebSocket连接已断开.")
         except Exception as e:
             logger.exception(f"WebSocket中发生意外错误: {e}")
-            # 尝试向客户端发送错误信息
-            try:
-                await websocket.send_json(
+            # 尝试向客户端发送错误信息，连接尚未建立时无法发送
+            if connection:
+                await connection.close_with_message(
                     {
                         "type": "error",
                         "code": "UNEXPECTED_ERROR",
                         "message": "服务器发生内部错误，连接已中断。"
                     }
                 )
-            except (WebSocketDisconnect, RuntimeError):
-                logger.warning("无法向客户端发送错误消息，连接已关闭.")
         finally:
             if user:
                 manager.disconnect(user.id, conn_id)
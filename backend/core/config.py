@@ -80,6 +80,74 @@ class Settings(BaseSettings):
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD", "")
+    # WebSocket 每个连接的发送队列长度、单条消息发送超时（秒）
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+    # 慢速客户端的处理策略：drop（丢弃最旧的消息）或 disconnect（断开连接，客户端重连后重新同步）
+    WS_SLOW_CONSUMER_POLICY: str = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop")
+    # 新文章通知的合并窗口（秒）：窗口内同一用户的多条通知合并为一条摘要，0 表示立即发送
+    WS_DIGEST_WINDOW: float = float(os.getenv("WS_DIGEST_WINDOW", "5"))
+    # 文章列表缓存的有效期（秒），0 表示不缓存
+    ARTICLE_CACHE_TTL: int = int(os.getenv("ARTICLE_CACHE_TTL", "300"))
+    # 每天重新计算订阅计数器的时间（小时，0-23），修正增量维护可能产生的计数偏差
+    FEED_COUNTER_RECALC_HOUR: int = int(os.getenv("FEED_COUNTER_RECALC_HOUR", "3"))
+
+    # 文章保留策略（可被Feed的 retention_days / retention_max_items 覆盖），收藏和稍后读的文章始终保留
+    # 保留天数：入库超过该天数的文章会被清理，0 表示不按时间清理
+    ARTICLE_RETENTION_DAYS: int = int(os.getenv("ARTICLE_RETENTION_DAYS", "180"))
+    # 每个Feed最多保留的文章数量，0 表示不限
+    ARTICLE_RETENTION_MAX_ITEMS: int = int(os.getenv("ARTICLE_RETENTION_MAX_ITEMS", "0"))
+    # 按时间清理时每个Feed始终保留的最新文章数量，避免仍在源中的条目被清理后又作为新文章重新入库
+    ARTICLE_RETENTION_MIN_ITEMS: int = int(os.getenv("ARTICLE_RETENTION_MIN_ITEMS", "100"))
+    # 每天执行保留策略的时间（小时，0-23）
+    ARTICLE_RETENTION_HOUR: int = int(os.getenv("ARTICLE_RETENTION_HOUR", "4"))
+
+    # 清理已注销用户和取消订阅数据时单次任务的时间预算（秒），未完成的部分由任务重新入队继续
+    PURGE_TIME_BUDGET: int = int(os.getenv("PURGE_TIME_BUDGET", "240"))
+    # 每天补偿未完成清理任务的时间（小时，0-23）
+    PURGE_SWEEP_HOUR: int = int(os.getenv("PURGE_SWEEP_HOUR", "5"))
+
+    # 出站HTTP客户端配置（进程内共享连接池）
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "20"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    # 是否启用HTTP/2，需要额外安装 h2 (httpx[http2])
+    HTTP_HTTP2: bool = os.getenv("HTTP_HTTP2", "false").lower() == "true"
+    HTTP_USER_AGENT: str = os.getenv("HTTP_USER_AGENT", "Feedboard/0.1 (+https://github.com/lee-lipeng/Feedboard)")
+
+    # Feed刷新配置
+    # 全局最大并发抓取数
+    FEED_REFRESH_CONCURRENCY: int = int(os.getenv("FEED_REFRESH_CONCURRENCY", "20"))
+    # 同一主机的最大并发抓取数，避免压垮单个站点
+    FEED_REFRESH_PER_HOST: int = int(os.getenv("FEED_REFRESH_PER_HOST", "2"))
+    # 每批从数据库读取的Feed数量
+    FEED_REFRESH_BATCH_SIZE: int = int(os.getenv("FEED_REFRESH_BATCH_SIZE", "200"))
+
+    # Feed解析进程池大小，0 表示不使用进程池（在线程中解析）
+    FEED_PARSER_PROCESSES: int = int(os.getenv("FEED_PARSER_PROCESSES", str(os.cpu_count() or 1)))
+
+    # 单个Feed响应体的大小上限（字节），超过则中止下载
+    FEED_MAX_BYTES: int = int(os.getenv("FEED_MAX_BYTES", str(10 * 1024 * 1024)))
+    # 单次抓取最多处理的条目数量
+    FEED_MAX_ENTRIES: int = int(os.getenv("FEED_MAX_ENTRIES", "500"))
+    # 是否启用流式增量解析：边下载边解析，遇到已入库的GUID或达到条目上限即停止下载
+    FEED_STREAMING_INGEST: bool = os.getenv("FEED_STREAMING_INGEST", "false").lower() == "true"
+
+    # 自适应抓取调度配置（单位：秒）
+    FEED_DEFAULT_FETCH_INTERVAL: int = int(os.getenv("FEED_DEFAULT_FETCH_INTERVAL", "1800"))
+    FEED_MIN_FETCH_INTERVAL: int = int(os.getenv("FEED_MIN_FETCH_INTERVAL", "600"))
+    FEED_MAX_FETCH_INTERVAL: int = int(os.getenv("FEED_MAX_FETCH_INTERVAL", "86400"))
+    # 抓取时间的随机抖动比例，打散同一时刻的抓取请求
+    FEED_FETCH_JITTER: float = float(os.getenv("FEED_FETCH_JITTER", "0.1"))
+    # 新订阅已存在的Feed时，若其在该时间内抓取过，则直接复用已存储的文章而不重新抓取
+    FEED_REUSE_MAX_AGE: int = int(os.getenv("FEED_REUSE_MAX_AGE", "1800"))
+    # 调度器领取Feed后的租约时长，防止重叠的调度周期重复抓取
+    FEED_FETCH_LEASE: int = int(os.getenv("FEED_FETCH_LEASE", "600"))
+
+    # 全文搜索的中日韩文字切分方式：bigram（二元切分，无需额外依赖）或 jieba（需安装 jieba），修改后需重建索引
+    SEARCH_CJK_TOKENIZER: str = os.getenv("SEARCH_CJK_TOKENIZER", "bigram")
 
     # ORM配置
     DB_MODELS: List[str] = ["models", "aerich.models"]
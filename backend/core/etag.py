@@ -0,0 +1,41 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+# 客户端仍需每次向服务端确认，但内容未变化时只返回304而不返回正文
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    根据资源的版本信息（行更新时间、用户缓存代数、查询参数等）计算强ETag。
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    判断请求的 If-None-Match 是否与当前ETag匹配。
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def not_modified_response(etag: str) -> Response:
+    """构造不带正文的304响应。"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """为正常响应设置ETag和缓存控制头。"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
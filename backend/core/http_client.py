@@ -0,0 +1,68 @@
+from typing import Optional
+
+import httpx
+from loguru import logger
+
+from core.config import settings
+
+# 进程级共享的HTTP客户端，复用TCP/TLS连接、连接池和keep-alive
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """检查是否可以启用HTTP/2（依赖可选的 h2 包）。"""
+    if not settings.HTTP_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("已配置启用HTTP/2，但未安装 h2 包，回退到HTTP/1.1。")
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    """根据配置构建HTTP客户端。"""
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        follow_redirects=True,
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        headers={"User-Agent": settings.HTTP_USER_AGENT},
+    )
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """
+    初始化共享HTTP客户端，应在进程启动时（API lifespan / Worker startup）调用。
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("共享HTTP客户端已初始化。")
+    return _client
+
+
+async def close_http_client() -> None:
+    """
+    关闭共享HTTP客户端并释放连接池，应在进程关闭时调用。
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("共享HTTP客户端已关闭。")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取共享HTTP客户端。若尚未初始化（如在脚本中直接调用服务函数），则按需创建。
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from loguru import logger
+from redis.asyncio import Redis
+
+from core.config import settings
+
+# 进程级共享的Redis客户端，用于缓存等非任务队列用途
+_redis: Optional[Redis] = None
+
+
+def _build_redis() -> Redis:
+    """根据配置构建Redis客户端。"""
+    return Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD or None,
+        decode_responses=True,
+    )
+
+
+async def init_redis() -> Redis:
+    """
+    初始化共享Redis客户端，应在进程启动时（API lifespan / Worker startup）调用。
+    """
+    global _redis
+    if _redis is None:
+        _redis = _build_redis()
+        logger.info("共享Redis客户端已初始化。")
+    return _redis
+
+
+async def close_redis() -> None:
+    """
+    关闭共享Redis客户端并释放连接池，应在进程关闭时调用。
+    """
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+        logger.info("共享Redis客户端已关闭。")
+
+
+def get_redis() -> Redis:
+    """
+    获取共享Redis客户端。若尚未初始化（如在脚本中直接调用服务函数），则按需创建。
+    """
+    global _redis
+    if _redis is None:
+        _redis = _build_redis()
+    return _redis
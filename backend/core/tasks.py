@@ -2,14 +2,25 @@ from typing import Dict, Any
 from datetime import datetime
 
 from tortoise import Tortoise
+from tortoise.expressions import Q
 from arq.connections import RedisSettings
-from arq import cron
+from arq import cron, func
 from loguru import logger
 
 from core.config import settings
+from core.http_client import init_http_client, close_http_client
+from core.redis import init_redis, close_redis
 from db.init_db import TORTOISE_ORM
-from models.feed import Feed
-from services.feed_service import parse_feed_from_url, fetch_and_save_articles, get_user_feeds, create_feed
+from models import Feed, Article
+from services.feed_service import create_feed, fetch_and_save_articles, is_recently_fetched, backfill_article_excerpts
+from services.feed_parser import shutdown_parser_pool
+from services.refresh_service import refresh_feeds, refresh_due_feeds
+from services.search_service import ensure_search_index, rebuild_search_index
+from services.counter_service import recalculate_all_feed_counters
+from services.read_position_service import flush_read_positions
+from services.notification_service import new_articles_digest
+from services.purge_service import purge_feed_interactions, purge_user, find_unfinished_purges
+from services.retention_service import apply_retention_policy
 from api.ws import manager
 
 
@@ -40,6 +51,17 @@ async def startup(ctx: Dict[str, Any]):
     """
     ctx['tortoise_initialized'] = False
     await setup_db(ctx)
+    await init_http_client()
+    await init_redis()
+
+    # 全文索引为空但已有文章（如首次升级到全文搜索）时，在后台补建索引
+    backend = await ensure_search_index()
+    if backend.available and await backend.is_empty() and await Article.exists():
+        logger.info("全文索引为空，已加入重建任务。")
+        await ctx['redis'].enqueue_job("rebuild_search_index_task", _job_id="rebuild_search_index")
+    # 升级前入库的文章没有纯文本摘录，在后台补全
+    if await Article.filter(excerpt__isnull=True).exists():
+        await ctx['redis'].enqueue_job("backfill_article_excerpts_task", _job_id="backfill_article_excerpts")
     logger.info("ARQ Worker 启动...")
 
 
@@ -47,6 +69,19 @@ async def shutdown(ctx: Dict[str, Any]):
     """
     Worker 关闭时执行
     """
+    # 发送尚未发出的新文章通知摘要
+    try:
+        await new_articles_digest.flush()
+    except Exception as e:
+        logger.exception(f"关闭时发送新文章通知摘要失败: {e}")
+    # 写回缓冲区中剩余的阅读位置
+    try:
+        await flush_read_positions()
+    except Exception as e:
+        logger.exception(f"关闭时写回阅读位置失败: {e}")
+    await close_http_client()
+    await close_redis()
+    shutdown_parser_pool()
     await cleanup_db(ctx)
     logger.info("ARQ Worker 关闭...")
 
@@ -60,24 +95,22 @@ async def process_new_feed_task(ctx: Dict[str, Any], feed_id: int, user_id: int)
         return
 
     try:
-        # 1. 解析Feed信息并更新Feed对象
-        if feed_info := await parse_feed_from_url(feed.url):
-            feed.title = feed_info.get("title", "未命名订阅源")
-            feed.description = feed_info.get("description")
-            feed.website_url = feed_info.get("website_url")
-            feed.image_url = feed_info.get("image_url")
-            await feed.save()
-
-        # 2. 获取并创建文章
-        new_articles = await fetch_and_save_articles(feed, is_initial_fetch=True)
-
-        # 3. 通知发起操作的用户
-        message = f"订阅源 '{feed.title}' 添加成功"
-        if new_articles:
-            message += f"，已抓取 {len(new_articles)} 篇新文章。"
+        if is_recently_fetched(feed):
+            # 1a. Feed刚刚抓取过：无需再次下载，订阅后即可直接看到已存储的文章
+            logger.info(f"订阅源 '{feed.url}' 最近已抓取，复用已存储的文章。")
+            article_count = await Article.filter(feed_id=feed.id).count()
+            message = f"订阅源 '{feed.title}' 添加成功，共有 {article_count} 篇文章。"
         else:
-            message += "，暂无新文章。"
+            # 1b. 只抓取并解析一次：同时更新Feed元数据并保存新文章
+            new_articles = await fetch_and_save_articles(feed, is_initial_fetch=True)
+
+            message = f"订阅源 '{feed.title}' 添加成功"
+            if new_articles:
+                message += f"，已抓取 {len(new_articles)} 篇新文章。"
+            else:
+                message += "，暂无新文章。"
 
+        # 2. 通知发起操作的用户
         await manager.send_personal_message(
             {
                 "type": "feed_processed",
@@ -102,15 +135,90 @@ async def refresh_all_feeds_task(ctx: Dict[str, Any]):
     定时任务：更新所有订阅源的文章
     """
     logger.info(f"[{datetime.now()}] 开始执行定时任务：刷新所有Feed...")
-    feeds = await Feed.all()
+    stats = await refresh_feeds()
+    logger.info(
+        f"[{datetime.now()}] 定时任务执行完毕：刷新所有Feed，共 {stats['total']} 个，"
+        f"失败 {stats['failed']} 个，新文章 {stats['new_articles']} 篇"
+    )
+
+
+async def schedule_due_feeds_task(ctx: Dict[str, Any]):
+    """
+    定时任务：只刷新已到达计划抓取时间的订阅源
+    """
+    stats = await refresh_due_feeds()
+    if stats['total']:
+        logger.info(f"调度周期完成：刷新到期Feed {stats['total']} 个，失败 {stats['failed']} 个，新文章 {stats['new_articles']} 篇")
+
+
+async def rebuild_search_index_task(ctx: Dict[str, Any]):
+    """
+    后台任务：为全部文章重建全文索引
+    """
+    logger.info("开始重建全文索引...")
+    indexed = await rebuild_search_index()
+    logger.info(f"全文索引重建完成，共索引 {indexed} 篇文章")
+
+
+async def backfill_article_excerpts_task(ctx: Dict[str, Any]):
+    """
+    后台任务：为历史文章补全纯文本摘录
+    """
+    updated = await backfill_article_excerpts()
+    logger.info(f"文章摘录补全完成，共处理 {updated} 篇文章")
+
+
+async def recalculate_feed_counters_task(ctx: Dict[str, Any]):
+    """
+    定时任务：重新计算所有订阅的未读数和收藏数，修正可能的计数偏差。
+    升级时的计数器初始化由数据库迁移完成。
+    """
+    await recalculate_all_feed_counters()
 
-    for feed in feeds:
-        try:
-            await fetch_and_save_articles(feed)
-        except Exception as e:
-            logger.exception(f"更新订阅源 [{feed.title}-{feed.url}] 时出错: {e}")
 
-    logger.info(f"[{datetime.now()}] 定时任务执行完毕：刷新所有Feed")
+async def flush_read_positions_task(ctx: Dict[str, Any]):
+    """
+    定时任务：将缓冲区中的阅读位置批量写回数据库
+    """
+    await flush_read_positions()
+
+
+async def purge_feed_interactions_task(ctx: Dict[str, Any], user_id: int, feed_id: int):
+    """
+    后台任务：取消订阅后分批清理用户在该Feed下的文章交互记录。
+    超出时间预算时重新入队，由下一个任务继续清理。
+    """
+    if not await purge_feed_interactions(user_id, feed_id, time_budget=settings.PURGE_TIME_BUDGET):
+        await ctx['redis'].enqueue_job("purge_feed_interactions_task", user_id=user_id, feed_id=feed_id)
+
+
+async def purge_user_task(ctx: Dict[str, Any], user_id: int):
+    """
+    后台任务：分批删除已注销用户的全部数据。
+    超出时间预算时重新入队，由下一个任务继续清理。
+    """
+    if not await purge_user(user_id, time_budget=settings.PURGE_TIME_BUDGET):
+        await ctx['redis'].enqueue_job("purge_user_task", user_id=user_id)
+
+
+async def purge_sweep_task(ctx: Dict[str, Any]):
+    """
+    定时任务：为中断或失败而未完成的清理重新加入任务（已注销的用户、取消订阅后残留的交互记录）
+    """
+    user_ids, subscriptions = await find_unfinished_purges()
+    for user_id in user_ids:
+        await ctx['redis'].enqueue_job("purge_user_task", user_id=user_id)
+    for user_id, feed_id in subscriptions:
+        await ctx['redis'].enqueue_job("purge_feed_interactions_task", user_id=user_id, feed_id=feed_id)
+    if user_ids or subscriptions:
+        logger.info(f"已重新加入 {len(user_ids)} 个用户和 {len(subscriptions)} 个取消订阅的清理任务")
+
+
+async def apply_retention_policy_task(ctx: Dict[str, Any]):
+    """
+    定时任务：按保留策略清理过期文章
+    """
+    await apply_retention_policy()
 
 
 async def refresh_feed(ctx: Dict[str, Any], feed: Feed):
@@ -127,12 +235,8 @@ async def refresh_all_feeds_for_user(ctx: Dict[str, Any], user_id: int):
     """
     后台任务：为指定用户刷新其所有订阅源
     """
-    user_feeds = await get_user_feeds(user_id)
-    for user_feed in user_feeds:
-        try:
-            await fetch_and_save_articles(user_feed.feed)
-        except Exception as e:
-            logger.exception(f"更新订阅源 [{user_feed.feed.title}-{user_feed.feed.url}] 时出错: {e}")
+    stats = await refresh_feeds(Q(user_subscriptions__user_id=user_id))
+    logger.info(f"为用户 {user_id} 刷新了 {stats['total']} 个订阅源，新文章 {stats['new_articles']} 篇")
 
 
 async def import_feeds_for_user_task(ctx: Dict[str, Any], user_id: int, subscriptions: list):
@@ -179,17 +283,51 @@ class WorkerSettings:
     functions = [
         process_new_feed_task,
         refresh_all_feeds_task,
+        schedule_due_feeds_task,
         refresh_feed,
         refresh_all_feeds_for_user,
-        import_feeds_for_user_task
+        import_feeds_for_user_task,
+        rebuild_search_index_task,
+        backfill_article_excerpts_task,
+        recalculate_feed_counters_task,
+        flush_read_positions_task,
+        # 任务按时间预算分段执行，超时时间为预算加上最后一批删除所需的余量
+        func(purge_feed_interactions_task, timeout=settings.PURGE_TIME_BUDGET + 60),
+        func(purge_user_task, timeout=settings.PURGE_TIME_BUDGET + 60),
+        purge_sweep_task,
+        apply_retention_policy_task
     ]
     on_startup = startup
     on_shutdown = shutdown
     cron_jobs = [
         cron(
-            refresh_all_feeds_task,
-            minute={0, 30},  # 每30分钟执行
-            run_at_startup=True  # 启动时立即执行一次
+            schedule_due_feeds_task,
+            second=0  # 每分钟检查一次到期的Feed，具体抓取频率由各Feed自适应调度决定
+        ),
+        cron(
+            flush_read_positions_task,
+            second=set(range(0, 60, 5)),  # 每5秒批量写回一次阅读位置
+            unique=True
+        ),
+        cron(
+            recalculate_feed_counters_task,
+            hour=settings.FEED_COUNTER_RECALC_HOUR,  # 每天重新计算一次订阅计数器，作为增量维护的兜底
+            minute=30,
+            unique=True,
+            timeout=3600
+        ),
+        cron(
+            apply_retention_policy_task,
+            hour=settings.ARTICLE_RETENTION_HOUR,  # 每天执行一次文章保留策略
+            minute=0,
+            unique=True,
+            timeout=3600  # 首次执行可能需要清理大量历史文章；分批删除，超时中断后下次继续
+        ),
+        cron(
+            purge_sweep_task,
+            hour=settings.PURGE_SWEEP_HOUR,  # 每天补偿一次中断或失败的清理任务
+            minute=0,
+            unique=True
         )
     ]
 
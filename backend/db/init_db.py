@@ -4,6 +4,7 @@ from loguru import logger
 from tortoise import Tortoise
 
 from core.config import settings
+from services.search_service import ensure_search_index
 from services.user_service import get_user_by_email, create_user
 
 TORTOISE_ORM = {
@@ -33,6 +34,8 @@ async def init_db() -> None:
         await Tortoise.init(config=TORTOISE_ORM)
         # 创建初始用户
         await create_initial_user()
+        # 创建全文索引所需的表
+        await ensure_search_index()
 
         logger.info("数据库初始化流程完成")
     except Exception as e:
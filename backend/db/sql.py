@@ -0,0 +1,27 @@
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from core.config import settings
+
+
+def get_connection() -> BaseDBAsyncClient:
+    """
+    获取默认数据库连接，用于ORM无法直接表达的原生SQL（全文索引、集合操作等）。
+    """
+    return connections.get("default")
+
+
+def is_postgres() -> bool:
+    """
+    当前是否使用PostgreSQL。与 DATABASE_URI 的组装逻辑一致：非 sqlite 即视为 postgres。
+    """
+    return settings.DB_TYPE != "sqlite"
+
+
+def placeholders(count: int, start: int = 1) -> list:
+    """
+    生成当前数据库方言的参数占位符：PostgreSQL 为 $1、$2…，SQLite 为 ?。
+    """
+    if is_postgres():
+        return [f"${index}" for index in range(start, start + count)]
+    return ["?"] * count
@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,10 +9,13 @@ from loguru import logger
 from tortoise.contrib.fastapi import register_tortoise
 
 from core.config import settings
+from core.http_client import init_http_client, close_http_client
+from core.redis import init_redis, close_redis
 from db.init_db import init_db, TORTOISE_ORM
 from core.exception_handlers import setup_exception_handlers
 from core.logging_config import setup_logging
 from api import api_router
+from api.ws import manager
 
 
 @asynccontextmanager
@@ -31,8 +35,17 @@ async def lifespan(app: FastAPI):
             database=settings.REDIS_DB
         )
     )
+    await init_http_client()
+    await init_redis()
+    # 接收其他进程发布的WebSocket事件并投递给本进程的连接
+    ws_listener = asyncio.create_task(manager.listen())
     yield
     logger.info("Application shutdown...")
+    ws_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await ws_listener
+    await close_http_client()
+    await close_redis()
     await app.state.arq_pool.close()
 
 
@@ -52,7 +65,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["Content-Disposition"],
+        expose_headers=["Content-Disposition", "ETag"],
     )
 
     # 注册 Tortoise-ORM
@@ -0,0 +1,101 @@
+from tortoise import BaseDBAsyncClient
+
+# 同一Feed内GUID重复的文章只保留ID最小的一篇，必须在创建 (feed_id, guid) 唯一索引之前执行。
+# 重复文章上的交互记录迁移到保留的文章（每个用户迁移ID最小的一条，且仅当保留的文章上还没有记录时），
+# 其余交互记录随重复文章一起删除。随后根据去重后的数据初始化订阅计数器。
+DATA_MIGRATION = """
+        UPDATE "user_articles" SET "article_id" = (
+            SELECT MIN(k."id") FROM "articles" k JOIN "articles" cur
+                ON k."feed_id" = cur."feed_id" AND k."guid" = cur."guid"
+            WHERE cur."id" = "user_articles"."article_id"
+        )
+        WHERE "article_id" IN (
+            SELECT d."id" FROM "articles" d WHERE EXISTS (
+                SELECT 1 FROM "articles" k WHERE k."feed_id" = d."feed_id" AND k."guid" = d."guid" AND k."id" < d."id"
+            )
+        )
+        AND "id" = (
+            SELECT MIN(u."id") FROM "user_articles" u
+            JOIN "articles" a ON a."id" = u."article_id"
+            JOIN "articles" cur ON cur."id" = "user_articles"."article_id"
+            WHERE u."user_id" = "user_articles"."user_id" AND a."feed_id" = cur."feed_id" AND a."guid" = cur."guid"
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM "user_articles" u
+            JOIN "articles" a ON a."id" = u."article_id"
+            JOIN "articles" cur ON cur."id" = "user_articles"."article_id"
+            WHERE u."user_id" = "user_articles"."user_id" AND a."feed_id" = cur."feed_id" AND a."guid" = cur."guid"
+              AND a."id" < cur."id" AND NOT EXISTS (
+                  SELECT 1 FROM "articles" k WHERE k."feed_id" = a."feed_id" AND k."guid" = a."guid" AND k."id" < a."id"
+              )
+        );
+        DELETE FROM "user_articles" WHERE "article_id" IN (
+            SELECT d."id" FROM "articles" d WHERE EXISTS (
+                SELECT 1 FROM "articles" k WHERE k."feed_id" = d."feed_id" AND k."guid" = d."guid" AND k."id" < d."id"
+            )
+        );
+        DELETE FROM "articles" WHERE "id" IN (
+            SELECT d."id" FROM "articles" d WHERE EXISTS (
+                SELECT 1 FROM "articles" k WHERE k."feed_id" = d."feed_id" AND k."guid" = d."guid" AND k."id" < d."id"
+            )
+        );
+        UPDATE "user_feeds" SET
+            "unread_count" = (
+                SELECT COUNT(*) FROM "articles" a WHERE a."feed_id" = "user_feeds"."feed_id"
+            ) - (
+                SELECT COUNT(*) FROM "user_articles" ua JOIN "articles" a ON a."id" = ua."article_id"
+                WHERE ua."user_id" = "user_feeds"."user_id" AND a."feed_id" = "user_feeds"."feed_id" AND ua."is_read" = TRUE
+            ),
+            "favorite_count" = (
+                SELECT COUNT(*) FROM "user_articles" ua JOIN "articles" a ON a."id" = ua."article_id"
+                WHERE ua."user_id" = "user_feeds"."user_id" AND a."feed_id" = "user_feeds"."feed_id" AND ua."is_favorite" = TRUE
+            );"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    if db.capabilities.dialect == "postgres":
+        return """
+        ALTER TABLE "articles" ADD "excerpt" TEXT;
+        ALTER TABLE "feeds" ADD "retention_days" INT;
+        ALTER TABLE "feeds" ADD "fetch_interval" INT;
+        ALTER TABLE "feeds" ADD "next_fetch_at" TIMESTAMPTZ;
+        ALTER TABLE "feeds" ADD "retention_max_items" INT;
+        ALTER TABLE "feeds" ADD "content_hash" VARCHAR(64);
+        ALTER TABLE "feeds" ADD "last_modified" VARCHAR(64);
+        ALTER TABLE "feeds" ADD "etag" VARCHAR(255);
+        ALTER TABLE "feeds" ADD "error_count" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "user_feeds" ADD "favorite_count" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "user_feeds" ADD "unread_count" INT NOT NULL DEFAULT 0;""" + DATA_MIGRATION + """
+        CREATE UNIQUE INDEX IF NOT EXISTS "uid_articles_feed_id_4a3e99" ON "articles" ("feed_id", "guid");
+        CREATE INDEX IF NOT EXISTS "idx_feeds_next_fe_857962" ON "feeds" ("next_fetch_at");"""
+    return """
+        ALTER TABLE "articles" ADD "excerpt" TEXT /* 文章纯文本摘录，入库时生成，供列表展示 */;
+        ALTER TABLE "feeds" ADD "retention_days" INT /* 文章保留天数，为空时使用全局配置，0 表示不按时间清理 */;
+        ALTER TABLE "feeds" ADD "fetch_interval" INT /* 根据发布频率学习到的抓取间隔（秒） */;
+        ALTER TABLE "feeds" ADD "next_fetch_at" TIMESTAMP /* 下次计划抓取时间 */;
+        ALTER TABLE "feeds" ADD "retention_max_items" INT /* 最多保留的文章数量，为空时使用全局配置，0 表示不限 */;
+        ALTER TABLE "feeds" ADD "content_hash" VARCHAR(64) /* 上次响应内容的SHA-256哈希，用于无校验值时判断内容是否变化 */;
+        ALTER TABLE "feeds" ADD "last_modified" VARCHAR(64) /* 上次响应的Last-Modified校验值 */;
+        ALTER TABLE "feeds" ADD "etag" VARCHAR(255) /* 上次响应的ETag校验值 */;
+        ALTER TABLE "feeds" ADD "error_count" INT NOT NULL DEFAULT 0 /* 连续抓取失败次数 */;
+        ALTER TABLE "user_feeds" ADD "favorite_count" INT NOT NULL DEFAULT 0 /* 收藏文章数，随状态变更增量维护 */;
+        ALTER TABLE "user_feeds" ADD "unread_count" INT NOT NULL DEFAULT 0 /* 未读文章数，随入库和状态变更增量维护 */;""" + DATA_MIGRATION + """
+        CREATE UNIQUE INDEX "uid_articles_feed_id_4a3e99" ON "articles" ("feed_id", "guid");
+        CREATE INDEX "idx_feeds_next_fe_857962" ON "feeds" ("next_fetch_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_feeds_next_fe_857962";
+        DROP INDEX IF EXISTS "uid_articles_feed_id_4a3e99";
+        ALTER TABLE "articles" DROP COLUMN "excerpt";
+        ALTER TABLE "feeds" DROP COLUMN "retention_days";
+        ALTER TABLE "feeds" DROP COLUMN "fetch_interval";
+        ALTER TABLE "feeds" DROP COLUMN "next_fetch_at";
+        ALTER TABLE "feeds" DROP COLUMN "retention_max_items";
+        ALTER TABLE "feeds" DROP COLUMN "content_hash";
+        ALTER TABLE "feeds" DROP COLUMN "last_modified";
+        ALTER TABLE "feeds" DROP COLUMN "etag";
+        ALTER TABLE "feeds" DROP COLUMN "error_count";
+        ALTER TABLE "user_feeds" DROP COLUMN "favorite_count";
+        ALTER TABLE "user_feeds" DROP COLUMN "unread_count";"""
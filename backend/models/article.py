@@ -10,6 +10,7 @@ class Article(models.Model):
     author = fields.CharField(max_length=255, null=True, description="文章作者")
     summary = fields.TextField(null=True, description="文章摘要或简介")
     content = fields.TextField(null=True, description="文章完整内容（HTML格式）")
+    excerpt = fields.TextField(null=True, description="文章纯文本摘录，入库时生成，供列表展示")
     image_url = fields.CharField(max_length=512, null=True, description="文章特色图片链接")
     published_at = fields.DatetimeField(null=True, index=True, description="文章发布时间")
     guid = fields.CharField(max_length=512, index=True, description="文章全局唯一标识符")
@@ -22,6 +23,7 @@ class Article(models.Model):
 
     class Meta:
         table = "articles"
+        unique_together = (("feed", "guid"),)  # 同一订阅源内GUID唯一，用于批量去重插入
         ordering = ["-published_at", "-created_at"]
 
     def __str__(self):
@@ -27,6 +27,14 @@ class Feed(models.Model):
     image_url = fields.CharField(max_length=512, null=True, description="订阅源图片链接")
     category = fields.CharEnumField(FeedCategory, default=FeedCategory.OTHER, description="订阅源分类")
     last_fetched = fields.DatetimeField(null=True, description="最后更新时间")
+    etag = fields.CharField(max_length=255, null=True, description="上次响应的ETag校验值")
+    last_modified = fields.CharField(max_length=64, null=True, description="上次响应的Last-Modified校验值")
+    content_hash = fields.CharField(max_length=64, null=True, description="上次响应内容的SHA-256哈希，用于无校验值时判断内容是否变化")
+    next_fetch_at = fields.DatetimeField(null=True, index=True, description="下次计划抓取时间")
+    fetch_interval = fields.IntField(null=True, description="根据发布频率学习到的抓取间隔（秒）")
+    error_count = fields.IntField(default=0, description="连续抓取失败次数")
+    retention_days = fields.IntField(null=True, description="文章保留天数，为空时使用全局配置，0 表示不按时间清理")
+    retention_max_items = fields.IntField(null=True, description="最多保留的文章数量，为空时使用全局配置，0 表示不限")
     created_at = fields.DatetimeField(auto_now_add=True, description="记录创建时间")
     updated_at = fields.DatetimeField(auto_now=True, description="记录更新时间")
 
@@ -48,6 +56,8 @@ class UserFeed(models.Model):
     feed = fields.ForeignKeyField("models.Feed", related_name="user_subscriptions", on_delete=fields.CASCADE, description="关联的订阅源")
     title_override = fields.CharField(max_length=255, null=True, description="用户自定义标题")
     category = fields.CharEnumField(FeedCategory, default=FeedCategory.OTHER, description="用户自定义分类")
+    unread_count = fields.IntField(default=0, description="未读文章数，随入库和状态变更增量维护")
+    favorite_count = fields.IntField(default=0, description="收藏文章数，随状态变更增量维护")
     created_at = fields.DatetimeField(auto_now_add=True, description="记录创建时间")
     updated_at = fields.DatetimeField(auto_now=True, description="记录更新时间")
 
@@ -1,11 +1,216 @@
 import re
-from typing import List, Optional, Dict, Tuple
+import json
+import base64
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple, Union
 
 import httpx
 from loguru import logger
 
-from tortoise.expressions import Q
+from tortoise.expressions import Q, Subquery
+from tortoise.functions import Count
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+from core.config import settings
+from core.http_client import get_http_client
 from models import Article, UserArticle, UserFeed
+from services.cache_service import get_article_generation, article_cache_key, get_cached, set_cached, bump_article_generation
+from services.counter_service import apply_counter_delta
+from services.read_position_service import buffer_read_positions, get_buffered_read_position
+from db.sql import get_connection, is_postgres, placeholders
+from services.search_service import get_search_backend, query_terms, index_articles, build_snippet
+
+
+# 文章列表允许的排序字段
+ARTICLE_SORT_FIELDS = ("published_at", "created_at", "updated_at")
+# 文章列表允许的排序方向：desc 为从新到旧，asc 为从旧到新
+ARTICLE_SORT_ORDERS = ("desc", "asc")
+# 全部标记为已读时每条语句处理的文章数量
+MARK_READ_CHUNK_SIZE = 5000
+# 文章表中可以投影的列
+ARTICLE_COLUMNS = (
+    "id", "title", "url", "author", "summary", "content", "excerpt", "image_url",
+    "published_at", "guid", "feed_id", "created_at", "updated_at"
+)
+# 用户交互状态字段
+ARTICLE_STATE_FIELDS = ("is_read", "is_favorite", "read_later", "read_position")
+# fields 参数允许的全部字段
+ARTICLE_PROJECTABLE_FIELDS = ARTICLE_COLUMNS + ("feed_title",) + ARTICLE_STATE_FIELDS
+# 列表模式默认返回的字段：不包含摘要和正文，只返回预先生成的纯文本摘录
+ARTICLE_LIST_FIELDS = (
+    "id", "title", "url", "author", "excerpt", "image_url", "published_at",
+    "feed_id", "feed_title", "is_read", "is_favorite", "read_later"
+)
+
+
+def subscribed_articles(user_id: int) -> QuerySet[Article]:
+    """
+    构造用户订阅范围内全部文章的查询，订阅关系通过子查询在数据库端展开。
+    """
+    return Article.filter(feed_id__in=Subquery(UserFeed.filter(user_id=user_id).values("feed_id")))
+
+
+def resolve_article_fields(view: str = "full", fields: Optional[str] = None) -> Optional[Tuple[str, ...]]:
+    """
+    解析文章列表需要返回的字段。
+
+    Args:
+        view: 'full' 返回全部字段，'list' 返回列表展示所需的轻量字段。
+        fields: 可选，逗号分隔的字段列表，提供时优先于 view。
+
+    Returns:
+        需要返回的字段元组（始终包含 id）；返回全部字段时为None。
+
+    Raises:
+        ValueError: 视图或字段名无效。
+    """
+    if fields:
+        requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in requested if name not in ARTICLE_PROJECTABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+        return requested if "id" in requested else ("id",) + requested
+    if view == "list":
+        return ARTICLE_LIST_FIELDS
+    if view != "full":
+        raise ValueError(f"不支持的视图: {view}")
+    return None
+
+
+def encode_cursor(sort_field: str, article: Union[Article, Dict], sort_order: str = "desc") -> str:
+    """
+    根据一页中最后一篇文章（模型对象或投影后的字典）的排序键 (sort_field, id) 和排序方向生成不透明的分页游标。
+    """
+    if isinstance(article, dict):
+        value, article_id = article[sort_field], article["id"]
+    else:
+        value, article_id = getattr(article, sort_field), article.id
+    payload = {"f": sort_field, "o": sort_order, "v": value.isoformat() if value else None, "id": article_id}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, Optional[datetime], int]:
+    """
+    解析分页游标。不含排序方向的旧游标按 desc 处理。
+
+    Returns:
+        (排序字段, 排序方向, 排序值, 文章ID) 组成的元组。
+
+    Raises:
+        ValueError: 游标格式无效。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = datetime.fromisoformat(payload["v"]) if payload["v"] else None
+        return payload["f"], payload.get("o", "desc"), value, int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("无效的分页游标") from e
+
+
+def nulls_sort_first(sort_order: str) -> bool:
+    """
+    排序字段为NULL的文章是否排在非NULL文章之前。
+    PostgreSQL 把NULL视为最大值，SQLite 视为最小值，因此同一排序方向下两者的NULL位置相反。
+    """
+    return is_postgres() == (sort_order == "desc")
+
+
+def apply_cursor(query: QuerySet[Article], sort_field: str, cursor: str, sort_order: str = "desc") -> QuerySet[Article]:
+    """
+    在按 (sort_field, id) 同向排序的查询上应用键集分页条件，
+    直接定位到游标之后的位置，而无需 OFFSET 扫描前面的所有行。
+    排序字段为NULL的文章按数据库默认的NULL位置排在非NULL文章之前或之后，游标条件与之保持一致。
+    """
+    cursor_field, cursor_order, value, last_id = decode_cursor(cursor)
+    if cursor_field != sort_field or cursor_order != sort_order:
+        raise ValueError("分页游标与排序方式不匹配")
+    op = "lt" if sort_order == "desc" else "gt"
+    nulls_first = nulls_sort_first(sort_order)
+    if value is None:
+        condition = Q(**{f"{sort_field}__isnull": True, f"id__{op}": last_id})
+        if nulls_first:
+            condition |= Q(**{f"{sort_field}__isnull": False})
+        return query.filter(condition)
+    condition = Q(**{f"{sort_field}__{op}": value}) | Q(**{sort_field: value, f"id__{op}": last_id})
+    if not nulls_first:
+        condition |= Q(**{f"{sort_field}__isnull": True})
+    return query.filter(condition)
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    为按相关度排序的搜索结果生成分页游标。相关度不是稳定的键，只能记录偏移量。
+    """
+    payload = {"o": offset}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    解析搜索结果的分页游标。
+
+    Raises:
+        ValueError: 游标格式无效。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("无效的分页游标") from e
+    if offset < 0:
+        raise ValueError("无效的分页游标")
+    return offset
+
+
+async def paginate(
+        query: QuerySet[Article],
+        sort_field: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        columns: Optional[Dict[str, str]] = None,
+        sort_order: str = "desc"
+) -> Tuple[List[Union[Article, Dict]], Optional[str]]:
+    """
+    对文章查询进行分页。提供游标时使用键集分页，否则使用偏移量分页。
+    多取一行用于判断是否还有下一页。
+
+    Args:
+        columns: 可选，{输出键: 字段} 形式的投影。提供时只查询这些列并返回字典，
+                 否则返回预加载了Feed的完整模型对象。
+        sort_order: 排序方向，'desc' 或 'asc'，id 作为第二排序键与之同向。
+
+    Returns:
+        当前页的文章列表，以及下一页的游标（没有下一页时为None）。
+    """
+    prefix = "-" if sort_order == "desc" else ""
+    query = query.order_by(f"{prefix}{sort_field}", f"{prefix}id")
+    if cursor:
+        query = apply_cursor(query, sort_field, cursor, sort_order)
+    else:
+        query = query.offset(skip)
+
+    query = query.limit(limit + 1)
+    if columns:
+        # 游标需要排序键，即使调用方没有请求这些字段
+        articles = await query.values(**{"id": "id", sort_field: sort_field, **columns})
+    else:
+        articles = await query.prefetch_related("feed")
+    if len(articles) <= limit:
+        return list(articles), None
+    articles = list(articles[:limit])
+    return articles, encode_cursor(sort_field, articles[-1], sort_order)
+
+
+async def get_user_article_states(user_id: int, article_ids: List[int]) -> Dict[int, UserArticle]:
+    """
+    批量获取用户对一组文章的交互记录，以文章ID为键。没有记录的文章不会出现在结果中。
+    """
+    if not article_ids:
+        return {}
+    return {ua.article_id: ua for ua in await UserArticle.filter(user_id=user_id, article_id__in=article_ids)}
 
 
 async def get_user_articles(
@@ -16,10 +221,60 @@ async def get_user_articles(
         is_read: Optional[bool] = None,
         is_favorite: Optional[bool] = None,
         read_later: Optional[bool] = None,
-        sort_by: str = "published_at"  # 新增排序参数
-) -> Tuple[List[Dict], int]:
+        sort_by: str = "published_at",
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        view: str = "full",
+        fields: Optional[str] = None
+) -> Tuple[List[Dict], Optional[int], Optional[str]]:
+    """
+    获取用户的文章列表，优先读取Redis缓存，参数和返回值与 query_user_articles 相同。
+
+    缓存键包含用户的缓存代数：入库新文章、更新文章状态、全部标记为已读以及订阅变更时
+    都会递增代数，使该用户的全部列表缓存立即失效。Redis不可用时直接查询数据库。
+
+    Raises:
+        ValueError: 游标、视图或字段名无效。
+    """
+    params = {
+        "skip": skip, "limit": limit, "feed_id": feed_id, "is_read": is_read, "is_favorite": is_favorite,
+        "read_later": read_later, "sort_by": sort_by, "sort_order": sort_order, "cursor": cursor, "include_total": include_total,
+        "view": view, "fields": fields,
+    }
+
+    generation = await get_article_generation(user_id) if settings.ARTICLE_CACHE_TTL > 0 else None
+    if generation is not None:
+        cache_key = article_cache_key(user_id, generation, params)
+        cached = await get_cached(cache_key)
+        if cached is not None:
+            logger.debug(f"用户 {user_id} 的文章列表命中缓存。")
+            return cached["data"], cached["total"], cached["next_cursor"]
+
+    result, total, next_cursor = await query_user_articles(user_id, **params)
+
+    if generation is not None:
+        await set_cached(cache_key, {"data": result, "total": total, "next_cursor": next_cursor})
+    return result, total, next_cursor
+
+
+async def query_user_articles(
+        user_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        feed_id: Optional[int] = None,
+        is_read: Optional[bool] = None,
+        is_favorite: Optional[bool] = None,
+        read_later: Optional[bool] = None,
+        sort_by: str = "published_at",  # 新增排序参数
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        view: str = "full",
+        fields: Optional[str] = None
+) -> Tuple[List[Dict], Optional[int], Optional[str]]:
     """
-    获取用户的文章列表，支持多种过滤条件和排序。
+    从数据库查询用户的文章列表，支持多种过滤条件、排序和字段投影。
 
     Args:
         user_id: 用户ID。
@@ -29,38 +284,60 @@ async def get_user_articles(
         is_read: 按已读状态过滤。
         is_favorite: 按收藏状态过滤。
         read_later: 按稍后读状态过滤。
-        sort_by: 排序字段 (如 'published_at', 'created_at')。
+        sort_by: 排序字段 (如 'published_at', 'created_at')，不支持的字段按发布时间排序。
+        sort_order: 排序方向，'desc'（从新到旧）或 'asc'（从旧到新），不支持的值按 desc 排序。
+        cursor: 可选，上一页返回的游标。提供时使用键集分页并忽略 skip。
+        include_total: 是否计算符合条件的总文章数。深度滚动时可关闭以省去 COUNT 查询。
+        view: 'full' 返回完整文章，'list' 只返回列表展示所需的字段（不含摘要和正文）。
+        fields: 可选，逗号分隔的返回字段，提供时优先于 view。
 
     Returns:
-        一个元组，包含文章字典列表和符合条件的总文章数。
+        一个元组，包含文章字典列表、符合条件的总文章数（未计算时为None）和下一页游标。
+        使用字段投影时，每个字典只包含请求的字段。
+
+    Raises:
+        ValueError: 游标、视图或字段名无效。
     """
-    # 核心查询：基于 UserArticle，因为它链接了所有信息
-    query = UserArticle.filter(user_id=user_id)
+    projection = resolve_article_fields(view, fields)
+
+    # 核心查询：基于用户订阅范围内的文章。UserArticle 只在用户交互后才存在，
+    # 没有交互记录的文章视为未读、未收藏
+    query = subscribed_articles(user_id)
 
     # 应用过滤条件
     if feed_id:
-        query = query.filter(article__feed_id=feed_id)
-    if is_read is not None:
-        query = query.filter(is_read=is_read)
-    if is_favorite is not None:
-        query = query.filter(is_favorite=is_favorite)
-    if read_later is not None:
-        query = query.filter(read_later=read_later)
+        query = query.filter(feed_id=feed_id)
+    for field, value in (("is_read", is_read), ("is_favorite", is_favorite), ("read_later", read_later)):
+        if value is None:
+            continue
+        flagged = Subquery(UserArticle.filter(user_id=user_id, **{field: True}).values("article_id"))
+        query = query.filter(id__in=flagged) if value else query.exclude(id__in=flagged)
 
     # 获取总数
-    total = await query.count()
+    total = await query.count() if include_total else None
 
-    # 应用排序
-    # Tortoise ORM 使用 `article__published_at` 来引用关联模型的字段
-    order = f"-article__{sort_by}" if sort_by.startswith("published") else f"-{sort_by}"
+    # 应用排序，id 作为第二排序键保证分页稳定
+    sort_field = sort_by if sort_by in ARTICLE_SORT_FIELDS else "published_at"
+    if sort_order not in ARTICLE_SORT_ORDERS:
+        sort_order = "desc"
+
+    if projection is not None:
+        result, next_cursor = await get_projected_articles(
+            user_id, query, projection, sort_field, skip, limit, cursor, sort_order
+        )
+        logger.info(f"为用户 {user_id} 找到 {len(result)} 篇文章（总计 {total} 篇，投影字段 {len(projection)} 个）。")
+        return result, total, next_cursor
 
     # 获取分页后的数据，并预加载关联数据以避免N+1查询
-    user_articles = await query.order_by(order).offset(skip).limit(limit).prefetch_related("article", "article__feed")
+    articles, next_cursor = await paginate(query, sort_field, skip, limit, cursor, sort_order=sort_order)
+
+    # 批量获取这些文章的用户交互状态
+    states = await get_user_article_states(user_id, [article.id for article in articles])
 
     # 构建响应数据
     result = []
-    for ua in user_articles:
-        article = ua.article
+    for article in articles:
+        ua = states.get(article.id)
         result.append(
             {
                 "id": article.id,
@@ -69,22 +346,74 @@ async def get_user_articles(
                 "author": article.author,
                 "summary": article.summary,
                 "content": article.content,
+                "excerpt": article.excerpt,
                 "image_url": article.image_url,
                 "published_at": article.published_at,
                 "guid": article.guid,
                 "feed_id": article.feed_id,
                 "feed_title": article.feed.title,
-                "is_read": ua.is_read,
-                "is_favorite": ua.is_favorite,
-                "read_later": ua.read_later,
-                "read_position": ua.read_position,
+                "is_read": ua.is_read if ua else False,
+                "is_favorite": ua.is_favorite if ua else False,
+                "read_later": ua.read_later if ua else False,
+                "read_position": ua.read_position if ua else 0,
                 "created_at": article.created_at,
                 "updated_at": article.updated_at
             }
         )
 
     logger.info(f"为用户 {user_id} 找到 {len(result)} 篇文章（总计 {total} 篇）。")
-    return result, total
+    return result, total, next_cursor
+
+
+async def get_projected_articles(
+        user_id: int,
+        query: QuerySet[Article],
+        projection: Tuple[str, ...],
+        sort_field: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        sort_order: str = "desc"
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    只查询投影所需的列（Feed标题通过关联查询获得），并按需补充用户交互状态。
+
+    Returns:
+        只包含请求字段的文章字典列表，以及下一页游标。
+    """
+    columns = {name: name for name in projection if name in ARTICLE_COLUMNS}
+    if "feed_title" in projection:
+        columns["feed_title"] = "feed__title"
+
+    rows, next_cursor = await paginate(query, sort_field, skip, limit, cursor, columns, sort_order)
+
+    state_fields = [name for name in projection if name in ARTICLE_STATE_FIELDS]
+    states = await get_user_article_states(user_id, [row["id"] for row in rows]) if state_fields else {}
+
+    result = []
+    for row in rows:
+        item = {name: row[name] for name in projection if name in columns}
+        ua = states.get(row["id"])
+        for name in state_fields:
+            item[name] = getattr(ua, name) if ua else (0 if name == "read_position" else False)
+        result.append(item)
+    return result, next_cursor
+
+
+async def get_article_version(article_id: int, user_id: int) -> Optional[Tuple]:
+    """
+    获取文章详情响应的版本信息（文章与交互记录的更新时间、Feed标题、缓冲中的阅读位置），用于计算ETag。
+    只读取少量列，不加载正文。文章不存在或用户无权访问时返回None。
+    """
+    rows = await Article.filter(id=article_id).values("updated_at", "feed_id", "feed__title")
+    if not rows:
+        return None
+    article = rows[0]
+    if not await UserFeed.filter(user_id=user_id, feed_id=article["feed_id"]).exists():
+        return None
+    interaction = await UserArticle.filter(user_id=user_id, article_id=article_id).values_list("updated_at", flat=True)
+    buffered_position = await get_buffered_read_position(user_id, article_id)
+    return article["updated_at"], interaction[0] if interaction else None, article["feed__title"], buffered_position
 
 
 async def get_article_detail(article_id: int, user_id: int) -> Optional[Dict]:
@@ -126,6 +455,11 @@ async def get_article_detail(article_id: int, user_id: int) -> Optional[Dict]:
         "updated_at": article.updated_at
     }
 
+    # 尚未写回数据库的阅读位置比数据库中的更新
+    buffered_position = await get_buffered_read_position(user_id, article_id)
+    if buffered_position is not None:
+        article_dict["read_position"] = buffered_position
+
     # 如果是首次查看，自动标记为已读
     if not user_article or not user_article.is_read:
         logger.info(f"用户 {user_id} 首次查看文章 {article_id}，自动标记为已读。")
@@ -156,30 +490,54 @@ async def update_article_status(
         logger.warning(f"权限拒绝：用户 {user_id} 尝试更新未订阅源的文章 {article_id}")
         return None
 
-    # 获取或创建用户文章交互记录
-    user_article, _ = await UserArticle.get_or_create(user_id=user_id, article_id=article_id)
-
-    # 逐个检查并更新字段
-    updated_fields = []
-    if is_read is not None and user_article.is_read != is_read:
-        user_article.is_read = is_read
-        updated_fields.append("is_read")
-
-    if is_favorite is not None and user_article.is_favorite != is_favorite:
-        user_article.is_favorite = is_favorite
-        updated_fields.append("is_favorite")
-
-    if read_later is not None and user_article.read_later != read_later:
-        user_article.read_later = read_later
-        updated_fields.append("read_later")
-
-    if read_position is not None and user_article.read_position != read_position:
-        user_article.read_position = read_position
-        updated_fields.append("read_position")
+    # 阅读位置在滚动时频繁上报，写入缓冲区后由定时任务批量写回；Redis不可用时直接写数据库
+    buffered_position = None
+    if read_position is not None and await buffer_read_positions(user_id, {article_id: read_position}):
+        buffered_position, read_position = read_position, None
+
+    if is_read is None and is_favorite is None and read_later is None and read_position is None:
+        user_article = await UserArticle.get_or_none(user_id=user_id, article_id=article_id)
+        return {
+            "article_id": article_id,
+            "is_read": user_article.is_read if user_article else False,
+            "is_favorite": user_article.is_favorite if user_article else False,
+            "read_later": user_article.read_later if user_article else False,
+            "read_position": buffered_position
+        }
+
+    async with in_transaction():
+        # 获取或创建用户文章交互记录
+        user_article, _ = await UserArticle.get_or_create(user_id=user_id, article_id=article_id)
+
+        # 逐个检查并更新字段，同时记录计数器的变化量
+        updated_fields = []
+        unread_delta = favorite_delta = 0
+        if is_read is not None and user_article.is_read != is_read:
+            user_article.is_read = is_read
+            updated_fields.append("is_read")
+            unread_delta = -1 if is_read else 1
+
+        if is_favorite is not None and user_article.is_favorite != is_favorite:
+            user_article.is_favorite = is_favorite
+            updated_fields.append("is_favorite")
+            favorite_delta = 1 if is_favorite else -1
+
+        if read_later is not None and user_article.read_later != read_later:
+            user_article.read_later = read_later
+            updated_fields.append("read_later")
+
+        if read_position is not None and user_article.read_position != read_position:
+            user_article.read_position = read_position
+            updated_fields.append("read_position")
+
+        if updated_fields:
+            # auto_now 字段只有出现在 update_fields 中才会刷新，详情ETag依赖它判断状态是否变化
+            await user_article.save(update_fields=[*updated_fields, "updated_at"])
+            await apply_counter_delta(user_id, article.feed_id, unread_delta, favorite_delta)
+            logger.info(f"成功为用户 {user_id} 更新了文章 {article_id} 的状态: {updated_fields}")
 
     if updated_fields:
-        await user_article.save(update_fields=updated_fields)
-        logger.info(f"成功为用户 {user_id} 更新了文章 {article_id} 的状态: {updated_fields}")
+        await bump_article_generation([user_id])
 
     # 返回更新后的完整状态
     return {
@@ -187,59 +545,130 @@ async def update_article_status(
         "is_read": user_article.is_read,
         "is_favorite": user_article.is_favorite,
         "read_later": user_article.read_later,
-        "read_position": user_article.read_position
+        "read_position": buffered_position if buffered_position is not None else user_article.read_position
+    }
+
+
+async def update_articles_status_bulk(user_id: int, updates: List[Dict]) -> Dict:
+    """
+    批量更新用户对多篇文章的交互状态。
+
+    权限校验只需一次查询（文章必须属于用户订阅的Feed），现有交互记录一次性读出，
+    合并变更后按变更的字段分组批量 upsert 写回（只覆盖实际变更的字段），并在同一事务中调整订阅计数器。
+
+    Args:
+        user_id: 用户ID。
+        updates: 变更列表，每项包含 article_id 以及可选的 is_read、is_favorite、read_later、read_position。
+                 同一文章出现多次时，后面的变更覆盖前面的。
+
+    Returns:
+        包含更新数量、无权访问或不存在的文章ID以及各文章最新状态的字典。
+    """
+    changes_by_article: Dict[int, Dict] = {}
+    for item in updates:
+        changes = {name: item[name] for name in ARTICLE_STATE_FIELDS if item.get(name) is not None}
+        changes_by_article.setdefault(item["article_id"], {}).update(changes)
+
+    # 1. 一次查询完成权限校验：只保留用户已订阅Feed中的文章
+    feed_by_article = dict(
+        await subscribed_articles(user_id).filter(id__in=list(changes_by_article)).values_list("id", "feed_id")
+    )
+    not_found = [article_id for article_id in changes_by_article if article_id not in feed_by_article]
+    if not feed_by_article:
+        return {"updated": 0, "not_found": not_found, "items": []}
+
+    # 阅读位置写入缓冲区，由定时任务批量写回
+    positions = {
+        article_id: changes_by_article[article_id]["read_position"]
+        for article_id in feed_by_article
+        if "read_position" in changes_by_article[article_id]
     }
+    if positions and await buffer_read_positions(user_id, positions):
+        for article_id in positions:
+            del changes_by_article[article_id]["read_position"]
+
+    # 2. 一次性读出已有的交互记录，与变更合并
+    existing = await get_user_article_states(user_id, list(feed_by_article))
+    # 按实际变更的字段分组，upsert 只覆盖这些字段，不会用旧值覆盖并发写回的阅读位置等字段
+    rows_by_fields: Dict[Tuple[str, ...], List[UserArticle]] = defaultdict(list)
+    states = []
+    unread_deltas: Dict[int, int] = defaultdict(int)
+    favorite_deltas: Dict[int, int] = defaultdict(int)
+    for article_id, feed_id in feed_by_article.items():
+        ua = existing.get(article_id)
+        before = {name: getattr(ua, name) if ua else (0 if name == "read_position" else False) for name in ARTICLE_STATE_FIELDS}
+        after = {**before, **changes_by_article[article_id]}
+        states.append({"article_id": article_id, **after, "read_position": positions.get(article_id, after["read_position"])})
+        changed_fields = tuple(name for name in ARTICLE_STATE_FIELDS if after[name] != before[name])
+        if not changed_fields:
+            continue
+
+        if after["is_read"] != before["is_read"]:
+            unread_deltas[feed_id] += -1 if after["is_read"] else 1
+        if after["is_favorite"] != before["is_favorite"]:
+            favorite_deltas[feed_id] += 1 if after["is_favorite"] else -1
+        rows_by_fields[changed_fields].append(UserArticle(user_id=user_id, article_id=article_id, **after))
+
+    # 3. 批量 upsert 并调整计数器，在同一事务中完成
+    updated = sum(len(rows) for rows in rows_by_fields.values())
+    if updated:
+        async with in_transaction():
+            for changed_fields, rows in rows_by_fields.items():
+                await UserArticle.bulk_create(
+                    rows,
+                    on_conflict=["user_id", "article_id"],
+                    update_fields=[*changed_fields, "updated_at"]
+                )
+            for feed_id in set(unread_deltas) | set(favorite_deltas):
+                await apply_counter_delta(user_id, feed_id, unread_deltas[feed_id], favorite_deltas[feed_id])
+        await bump_article_generation([user_id])
+
+    logger.info(f"为用户 {user_id} 批量更新了 {updated} 篇文章的状态，{len(not_found)} 篇不存在或无权访问。")
+    return {"updated": updated, "not_found": not_found, "items": states}
 
 
 async def mark_all_articles_as_read(user_id: int, feed_id: Optional[int] = None) -> int:
     """
-    将指定Feed或所有Feed的文章全部标记为已读。此操作经过优化，高效执行。
-    它会为从未交互过的文章创建新的已读记录，并更新已存在但未读的记录。
-    
+    将指定Feed或所有Feed的文章全部标记为已读。
+
+    按文章ID分段，每段执行一条在数据库端完成的 INSERT ... SELECT ... ON CONFLICT 语句：
+    为从未交互过的文章创建已读记录，同时把已存在但未读的记录更新为已读。
+    文章ID不会加载到内存，内存占用与文章数量无关，语句数量为文章数 / MARK_READ_CHUNK_SIZE。
+
     Args:
         user_id: 用户的ID。
         feed_id: 可选，要操作的特定Feed的ID。如果为None，则操作用户的所有订阅。
-        
+
     Returns:
         成功标记为已读的文章总数。
     """
-    # 1. 确定要操作的文章ID范围
-    article_query = Article.filter()
+    # 1. 确定要操作的文章范围
+    article_query = subscribed_articles(user_id)
     if feed_id:
         if not await UserFeed.filter(user_id=user_id, feed_id=feed_id).exists():
             logger.warning(f"权限拒绝：用户 {user_id} 尝试对未订阅的Feed ID {feed_id} 进行全部已读操作。")
             return 0
         article_query = article_query.filter(feed_id=feed_id)
-    else:
-        subscribed_feed_ids = await UserFeed.filter(user_id=user_id).values_list('feed_id', flat=True)
-        if not subscribed_feed_ids:
-            return 0  # 用户没有任何订阅
-        article_query = article_query.filter(feed_id__in=subscribed_feed_ids)
-
-    all_article_ids = await article_query.values_list('id', flat=True)
-    if not all_article_ids:
-        return 0  # 订阅中没有任何文章
-
-    # 2. 查找用户已经存在的交互记录
-    existing_ua_query = UserArticle.filter(user_id=user_id, article_id__in=all_article_ids)
-    existing_ua_article_ids = await existing_ua_query.values_list('article_id', flat=True)
-
-    # 3. 计算哪些文章需要创建新的UserArticle记录
-    new_record_article_ids = set(all_article_ids) - set(existing_ua_article_ids)
-
-    # 4. 批量创建新的记录，并直接标记为已读
-    if new_record_article_ids:
-        new_records = [UserArticle(user_id=user_id, article_id=art_id, is_read=True) for art_id in new_record_article_ids]
-        await UserArticle.bulk_create(new_records)
-        logger.info(f"为用户 {user_id} 创建并标记了 {len(new_record_article_ids)} 篇新文章为已读。")
-
-    # 5. 批量更新已存在但未读的记录
-    rows_updated = await existing_ua_query.filter(is_read=False).update(is_read=True)
-    if rows_updated > 0:
-        logger.info(f"为用户 {user_id} 更新了 {rows_updated} 篇已有文章为已读。")
-
-    total_affected = len(new_record_article_ids) + rows_updated
+
+    # 2. 逐段执行集合式 upsert，每段的上界通过索引定位到第 MARK_READ_CHUNK_SIZE 篇文章
+    total_affected = 0
+    last_id = 0
+    while True:
+        upper = await article_query.filter(id__gt=last_id).order_by("id").offset(
+            MARK_READ_CHUNK_SIZE - 1
+        ).limit(1).values_list("id", flat=True)
+        upper_id = upper[0] if upper else None
+        # 每段的标记与未读数调整在同一事务中完成，只扣减本段实际变为已读的文章
+        async with in_transaction():
+            article_ids = await _mark_range_as_read(user_id, feed_id, last_id, upper_id)
+            await _decrement_unread(user_id, article_ids)
+        total_affected += len(article_ids)
+        if upper_id is None:
+            break
+        last_id = upper_id
+
     if total_affected > 0:
+        await bump_article_generation([user_id])
         logger.success(f"操作完成：共为用户 {user_id} 标记了 {total_affected} 篇文章为已读。")
     else:
         logger.info(f"操作完成：用户 {user_id} 的所有相关文章均已是已读状态。")
@@ -247,35 +676,99 @@ async def mark_all_articles_as_read(user_id: int, feed_id: Optional[int] = None)
     return total_affected
 
 
-async def search_user_articles(user_id: int, query: str, skip: int = 0, limit: int = 20) -> Tuple[List[Dict], int]:
+async def _decrement_unread(user_id: int, article_ids: List[int]) -> None:
+    """按Feed扣减刚被标记为已读的文章数量。"""
+    if not article_ids:
+        return
+    rows = await Article.filter(id__in=article_ids).annotate(count=Count("id")).group_by("feed_id").values(
+        "feed_id", "count"
+    )
+    for row in rows:
+        await apply_counter_delta(user_id, row["feed_id"], unread_delta=-row["count"])
+
+
+async def _mark_range_as_read(user_id: int, feed_id: Optional[int], after_id: int, upper_id: Optional[int]) -> List[int]:
     """
-    在用户的订阅文章中进行全文搜索（标题、摘要和内容）。
-    该实现经过优化，可有效执行搜索和分页。
+    将 (after_id, upper_id] 范围内用户订阅的文章标记为已读（upper_id 为None表示不设上界）。
+
+    Returns:
+        新建或由未读更新为已读的记录对应的文章ID。
     """
-    # 1. 确定用户的订阅范围
-    subscribed_feed_ids = await UserFeed.filter(user_id=user_id).values_list('feed_id', flat=True)
-    if not subscribed_feed_ids:
-        logger.debug(f"用户 {user_id} 没有任何订阅，搜索结果为空。")
-        return [], 0
+    now = UserArticle._meta.fields_map["updated_at"].to_db_value(datetime.now(), UserArticle)
+    values = [user_id, now, now, user_id, after_id]
+    if upper_id is not None:
+        values.append(upper_id)
+    if feed_id:
+        values.append(feed_id)
+    params = placeholders(len(values))
 
-    # 2. 构建搜索查询，直接在文章表上进行
-    search_query = Article.filter(feed_id__in=subscribed_feed_ids).filter(
-        Q(title__icontains=query) | Q(summary__icontains=query) | Q(content__icontains=query)
-    )
+    conditions = [
+        f'a."feed_id" IN (SELECT "feed_id" FROM "user_feeds" WHERE "user_id" = {params[3]})',
+        f'a."id" > {params[4]}',
+    ]
+    extra = iter(params[5:])
+    if upper_id is not None:
+        conditions.append(f'a."id" <= {next(extra)}')
+    if feed_id:
+        conditions.append(f'a."feed_id" = {next(extra)}')
 
-    # 3. 获取总数用于分页
-    total = await search_query.count()
+    sql = f"""INSERT INTO "user_articles"
+            ("user_id", "article_id", "is_read", "is_favorite", "read_later", "read_position", "created_at", "updated_at")
+        SELECT {params[0]}, a."id", TRUE, FALSE, FALSE, 0, {params[1]}, {params[2]}
+        FROM "articles" a
+        WHERE {" AND ".join(conditions)}
+        ON CONFLICT ("user_id", "article_id") DO UPDATE SET "is_read" = TRUE, "updated_at" = excluded."updated_at"
+        WHERE "user_articles"."is_read" = FALSE
+        RETURNING "article_id\""""
+    _, rows = await get_connection().execute_query(sql, values)
+    return [row["article_id"] for row in rows]
 
-    # 4. 获取分页后的文章数据
-    articles = await search_query.prefetch_related("feed").order_by("-published_at").offset(skip).limit(limit)
 
-    # 5. 批量获取这些文章的用户交互状态，以避免N+1查询
-    article_ids = [article.id for article in articles]
-    user_articles_map = {
-        ua.article_id: ua for ua in await UserArticle.filter(user_id=user_id, article_id__in=article_ids)
-    }
+async def search_user_articles(
+        user_id: int,
+        query: str,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+) -> Tuple[List[Dict], Optional[int], Optional[str]]:
+    """
+    在用户的订阅文章中进行全文搜索（标题、摘要和内容）。
+    全文索引可用时按相关度排序，并使用基于偏移量的游标分页；
+    否则退回到 LIKE 查询，按发布时间排序并使用 (published_at, id) 键集游标分页。
+    结果只包含高亮后的摘要片段，不返回正文，完整内容通过文章详情接口按需获取。
+
+    Raises:
+        ValueError: 游标无效。
+    """
+    backend = get_search_backend()
+    if backend.available and query_terms(query):
+        # 1. 在全文索引中按相关度检索当前页的文章ID，多取一条用于判断是否还有下一页
+        offset = decode_offset_cursor(cursor) if cursor else skip
+        article_ids, total = await backend.search(user_id, query, offset, limit + 1, include_total)
+        next_cursor = encode_offset_cursor(offset + limit) if len(article_ids) > limit else None
+        article_ids = article_ids[:limit]
+
+        # 2. 按检索结果的顺序加载文章
+        articles_map = {
+            article.id: article
+            for article in await Article.filter(id__in=article_ids).prefetch_related("feed")
+        }
+        articles = [articles_map[article_id] for article_id in article_ids if article_id in articles_map]
+    else:
+        # 1. 构建LIKE查询，订阅范围通过子查询在数据库端展开
+        search_query = subscribed_articles(user_id).filter(
+            Q(title__icontains=query) | Q(summary__icontains=query) | Q(content__icontains=query)
+        )
+
+        # 2. 获取总数和分页后的文章数据
+        total = await search_query.count() if include_total else None
+        articles, next_cursor = await paginate(search_query, "published_at", skip, limit, cursor)
 
-    # 6. 构建最终响应数据
+    # 3. 批量获取这些文章的用户交互状态，以避免N+1查询
+    user_articles_map = await get_user_article_states(user_id, [article.id for article in articles])
+
+    # 4. 构建最终响应数据
     result = []
     for article in articles:
         user_article = user_articles_map.get(article.id)
@@ -284,9 +777,11 @@ async def search_user_articles(user_id: int, query: str, skip: int = 0, limit: i
                 "id": article.id,
                 "title": article.title,
                 "url": article.url,
-                "content": article.content,  # 在搜索结果中直接返回内容
+                "content": None,  # 正文体积较大，搜索结果中只返回片段
+                "snippet": build_snippet(query, article.summary, article.content),
                 "author": article.author,
-                "summary": article.summary,
+                "summary": None,  # 许多源的摘要就是全文，列表展示使用 excerpt 和 snippet
+                "excerpt": article.excerpt,
                 "published_at": article.published_at.isoformat() if article.published_at else None,
                 "feed_id": article.feed_id,
                 "feed_title": article.feed.title,
@@ -300,7 +795,7 @@ async def search_user_articles(user_id: int, query: str, skip: int = 0, limit: i
         )
 
     logger.info(f"为用户 {user_id} 的搜索 '{query}' 找到了 {total} 篇文章，返回 {len(result)} 篇。")
-    return result, total
+    return result, total, next_cursor
 
 
 async def fetch_article_content(article: Article) -> str:
@@ -312,15 +807,15 @@ async def fetch_article_content(article: Article) -> str:
         return article.content
 
     try:
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            response = await client.get(article.url)
-            response.raise_for_status()
+        response = await get_http_client().get(article.url)
+        response.raise_for_status()
 
         body_content = extract_main_body(response.text) or article.summary
 
         if body_content:
             article.content = body_content
-            await article.save(update_fields=['content'])
+            await article.save(update_fields=['content', 'updated_at'])
+            await index_articles([article])
             logger.success(f"成功抓取并缓存了文章 {article.id} 的内容。")
             return body_content
 
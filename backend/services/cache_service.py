@@ -0,0 +1,73 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+
+from core.config import settings
+from core.redis import get_redis
+
+# 每个用户的文章列表缓存代数。代数递增后，旧代数下的缓存键不再被访问，随TTL自然过期
+ARTICLE_GENERATION_KEY = "articles:gen:{user_id}"
+# 文章列表缓存键：用户、代数、查询参数哈希
+ARTICLE_CACHE_KEY = "articles:{user_id}:{generation}:{digest}"
+
+
+def _json_default(value: Any) -> Any:
+    """序列化缓存数据中的日期时间。"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value)}")
+
+
+async def get_article_generation(user_id: int) -> Optional[int]:
+    """
+    获取用户当前的文章列表缓存代数。Redis不可用时返回None，调用方应跳过缓存。
+    """
+    try:
+        return int(await get_redis().get(ARTICLE_GENERATION_KEY.format(user_id=user_id)) or 0)
+    except Exception as e:
+        logger.warning(f"读取文章缓存代数失败，跳过缓存: {e}")
+        return None
+
+
+def article_cache_key(user_id: int, generation: int, params: Dict[str, Any]) -> str:
+    """根据用户、代数和查询参数构造缓存键。"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return ARTICLE_CACHE_KEY.format(user_id=user_id, generation=generation, digest=digest)
+
+
+async def get_cached(key: str) -> Optional[Any]:
+    """读取缓存，未命中或Redis出错时返回None。"""
+    try:
+        value = await get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"读取文章缓存失败: {e}")
+        return None
+    return json.loads(value) if value is not None else None
+
+
+async def set_cached(key: str, value: Any, ttl: int = settings.ARTICLE_CACHE_TTL) -> None:
+    """写入缓存，Redis出错时只记录日志。"""
+    try:
+        await get_redis().set(key, json.dumps(value, default=_json_default, ensure_ascii=False), ex=ttl)
+    except Exception as e:
+        logger.warning(f"写入文章缓存失败: {e}")
+
+
+async def bump_article_generation(user_ids: Iterable[int]) -> None:
+    """
+    使一组用户的文章列表缓存失效：在一次管道往返中递增他们的缓存代数。
+    文章列表的ETag同样基于该代数，因此即使关闭了缓存也需要递增。
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.incr(ARTICLE_GENERATION_KEY.format(user_id=user_id))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"递增文章缓存代数失败: {e}")
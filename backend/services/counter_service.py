@@ -0,0 +1,103 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from loguru import logger
+from tortoise.expressions import F
+
+from db.sql import get_connection, placeholders
+from models import UserFeed
+
+# 重新计算计数器时每批处理的用户数量
+COUNTER_RECALC_BATCH_SIZE = 100
+
+
+async def add_unread_for_subscribers(feed_id: int, count: int) -> None:
+    """
+    Feed入库新文章后，为所有订阅者增加未读数。一条UPDATE语句完成，与订阅者数量无关。
+    """
+    if count > 0:
+        await UserFeed.filter(feed_id=feed_id).update(unread_count=F("unread_count") + count)
+
+
+async def apply_counter_delta(user_id: int, feed_id: int, unread_delta: int = 0, favorite_delta: int = 0) -> None:
+    """
+    按文章状态变化调整单个订阅的未读数和收藏数。
+    """
+    changes = {}
+    if unread_delta:
+        changes["unread_count"] = F("unread_count") + unread_delta
+    if favorite_delta:
+        changes["favorite_count"] = F("favorite_count") + favorite_delta
+    if changes:
+        await UserFeed.filter(user_id=user_id, feed_id=feed_id).update(**changes)
+
+
+async def get_feed_counters(user_id: int) -> List[Dict]:
+    """
+    获取用户每个订阅的未读数和收藏数，只读取订阅表，复杂度与订阅数量成正比。
+    """
+    return await UserFeed.filter(user_id=user_id).values("feed_id", "category", "unread_count", "favorite_count")
+
+
+async def recalculate_feed_counters(user_id: int) -> None:
+    """
+    根据文章表和交互记录重新计算用户全部订阅的计数器，用于修正计数偏差。
+
+    计数在同一条UPDATE语句中完成，不会覆盖读取与写回之间并发的增量更新。
+    """
+    [user_param] = placeholders(1)
+    sql = f"""UPDATE "user_feeds" SET
+            "unread_count" = (
+                SELECT COUNT(*) FROM "articles" a WHERE a."feed_id" = "user_feeds"."feed_id"
+            ) - (
+                SELECT COUNT(*) FROM "user_articles" ua JOIN "articles" a ON a."id" = ua."article_id"
+                WHERE ua."user_id" = "user_feeds"."user_id" AND a."feed_id" = "user_feeds"."feed_id"
+                  AND ua."is_read" = TRUE
+            ),
+            "favorite_count" = (
+                SELECT COUNT(*) FROM "user_articles" ua JOIN "articles" a ON a."id" = ua."article_id"
+                WHERE ua."user_id" = "user_feeds"."user_id" AND a."feed_id" = "user_feeds"."feed_id"
+                  AND ua."is_favorite" = TRUE
+            )
+        WHERE "user_id" = {user_param}"""
+    await get_connection().execute_query(sql, [user_id])
+
+
+async def recalculate_all_feed_counters() -> int:
+    """
+    按用户分批重新计算所有订阅的计数器。
+
+    Returns:
+        处理的用户数量。
+    """
+    processed = 0
+    last_user_id = 0
+    while True:
+        user_ids = await UserFeed.filter(user_id__gt=last_user_id).order_by("user_id").distinct().limit(
+            COUNTER_RECALC_BATCH_SIZE
+        ).values_list("user_id", flat=True)
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            await recalculate_feed_counters(user_id)
+        processed += len(user_ids)
+        last_user_id = user_ids[-1]
+    logger.info(f"订阅计数器重新计算完成，共处理 {processed} 个用户")
+    return processed
+
+
+def summarize_counters(counters: List[Dict]) -> Dict:
+    """
+    汇总每个订阅的计数器，得到按分类和全部订阅的合计。
+    """
+    categories = defaultdict(lambda: {"unread_count": 0, "favorite_count": 0})
+    for counter in counters:
+        category = categories[counter["category"]]
+        category["unread_count"] += counter["unread_count"]
+        category["favorite_count"] += counter["favorite_count"]
+    return {
+        "feeds": counters,
+        "categories": dict(categories),
+        "total_unread": sum(counter["unread_count"] for counter in counters),
+        "total_favorite": sum(counter["favorite_count"] for counter in counters),
+    }
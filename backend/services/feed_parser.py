@@ -0,0 +1,157 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import feedparser
+from loguru import logger
+
+from core.config import settings
+
+# 每个解析子进程处理的任务数上限，定期回收以避免内存持续增长
+PARSER_MAX_TASKS_PER_CHILD = 500
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def parse_feed_document(content: bytes, max_entries: Optional[int] = None) -> Dict[str, Any]:
+    """
+    解析Feed文档并返回规范化后的数据。
+    该函数运行在解析子进程中，只返回可序列化的简单数据结构，
+    避免将完整的 FeedParserDict 传回事件循环所在的进程。
+
+    Args:
+        content: Feed文档的原始字节。
+        max_entries: 可选，最多返回的条目数量。
+
+    Returns:
+        包含 'feed'（源信息）、'entries'（条目列表）和 'bozo_exception' 的字典。
+    """
+    feed_data = feedparser.parse(content)
+    return {
+        "feed": normalize_feed_info(feed_data.get("feed", {})),
+        "entries": [normalize_entry(entry) for entry in feed_data.entries[:max_entries]],
+        "bozo_exception": str(feed_data.bozo_exception) if feed_data.bozo else None,
+    }
+
+
+def normalize_feed_info(feed_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    提取Feed的基本信息，如果文档中没有<feed>/<channel>信息则返回None。
+    """
+    if not feed_info:
+        return None
+    image = feed_info.get("image") or {}
+    return {
+        "title": feed_info.get("title"),
+        "description": feed_info.get("description"),
+        "website_url": feed_info.get("link"),
+        "image_url": image.get("href") or image.get("url"),
+    }
+
+
+def normalize_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将feedparser条目转换为入库所需的字段。
+    """
+    return {
+        "guid": entry.get("id", entry.get("link")),
+        "title": entry.get("title", "无标题"),
+        "url": entry.get("link", ""),
+        "author": entry.get("author"),
+        "summary": entry.get("summary"),
+        "content": entry.get("content", [{}])[0].get("value"),
+        "image_url": extract_image_url(entry),
+        "published_at": datetime(*entry.published_parsed[:6]) if entry.get("published_parsed") else None,
+    }
+
+
+def extract_image_url(entry: Dict[str, Any]) -> Optional[str]:
+    """
+    从Feed条目中提取图片URL
+    """
+    # 尝试从媒体内容中获取图片URL
+    if "media_content" in entry:
+        for media in entry["media_content"]:
+            if "medium" in media and media["medium"] == "image":
+                return media["url"]
+            elif "type" in media and media["type"].startswith("image/"):
+                return media["url"]
+
+    # 尝试从封面图片中获取
+    if "media_thumbnail" in entry and entry["media_thumbnail"]:
+        return entry["media_thumbnail"][0]["url"]
+
+    # 尝试从内容中提取图片URL
+    if "content" in entry and entry["content"]:
+        content = entry["content"][0]["value"]
+        img_start = content.find("<img")
+        if img_start != -1:
+            src_start = content.find("src=\"", img_start)
+            if src_start != -1:
+                src_start += 5
+                src_end = content.find("\"", src_start)
+                if src_end != -1:
+                    return content[src_start:src_end]
+
+    # 如果以上都失败，尝试从摘要中提取
+    if "summary" in entry:
+        content = entry["summary"]
+        img_start = content.find("<img")
+        if img_start != -1:
+            src_start = content.find("src=\"", img_start)
+            if src_start != -1:
+                src_start += 5
+                src_end = content.find("\"", src_start)
+                if src_end != -1:
+                    return content[src_start:src_end]
+
+    return None
+
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    按需创建解析进程池。FEED_PARSER_PROCESSES 为 0 时不使用进程池。
+    """
+    global _executor
+    if settings.FEED_PARSER_PROCESSES <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.FEED_PARSER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=PARSER_MAX_TASKS_PER_CHILD,
+        )
+        logger.info(f"Feed解析进程池已创建，进程数: {settings.FEED_PARSER_PROCESSES}")
+    return _executor
+
+
+async def parse_feed(content: bytes, max_entries: Optional[int] = None) -> Dict[str, Any]:
+    """
+    在事件循环之外解析Feed文档。
+    配置了进程池时在子进程中解析，以利用多核且不阻塞事件循环；
+    否则退回到线程中执行。
+
+    Args:
+        content: Feed文档的原始字节。
+        max_entries: 可选，最多返回的条目数量。
+
+    Returns:
+        规范化后的解析结果，参见 parse_feed_document。
+    """
+    executor = _get_executor()
+    if executor is None:
+        return await asyncio.to_thread(parse_feed_document, content, max_entries)
+    return await asyncio.get_running_loop().run_in_executor(executor, parse_feed_document, content, max_entries)
+
+
+def shutdown_parser_pool() -> None:
+    """
+    关闭解析进程池，应在进程关闭时调用。
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        logger.info("Feed解析进程池已关闭。")
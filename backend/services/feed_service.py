@@ -1,49 +1,35 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import hashlib
+from typing import List, Optional, Dict, Any, Set, Tuple
+from datetime import datetime, timedelta
 
-import feedparser
 import httpx
 from loguru import logger
 from tortoise.exceptions import DoesNotExist
-from tortoise.transactions import in_transaction
 
-from models import Feed, UserFeed, FeedCategory, Article, UserArticle
-
-
-async def parse_feed_from_url(url: str) -> Optional[dict]:
-    """
-    从给定的URL异步抓取并解析RSS源。
-
-    Args:
-        url: 要解析的RSS源的URL。
-
-    Returns:
-        包含解析后的源信息的字典，如果失败则返回None。
-    """
-    try:
-        async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-
-        feed_data = feedparser.parse(response.text)
-
-        if feed_data.bozo:
-            logger.warning(f"解析Feed时遇到问题 (bozo=1): {url}, 异常: {feed_data.bozo_exception}")
-
-        feed_info = feed_data.get('feed', {})
-        if not feed_info:
-            logger.error(f"解析失败，无法从 {url} 中找到<feed>信息。")
-            return None
-
-        logger.success(f"成功解析Feed: {url}")
-        return feed_info
-
-    except httpx.HTTPStatusError as e:
-        logger.error(f"从URL获取Feed时HTTP错误: {url}, 状态码: {e.response.status_code}")
-        return None
-    except Exception as e:
-        logger.exception(f"从URL解析Feed时发生未知错误: {url}, 错误: {e}")
-        return None
+from core.config import settings
+from core.http_client import get_http_client
+from db.sql import get_connection, placeholders
+from models import Feed, UserFeed, FeedCategory, Article
+from services.feed_parser import parse_feed
+from services.feed_stream import read_capped_body, stream_feed_entries
+from services.search_service import index_articles, html_to_text
+from services.counter_service import add_unread_for_subscribers
+from services.cache_service import bump_article_generation
+from services.schedule_service import schedule_after_success, schedule_after_failure, schedule_unchanged
+
+# 调度相关字段，单独保存时使用
+SCHEDULE_FIELDS = ("next_fetch_at", "fetch_interval", "error_count")
+# 文章纯文本摘录的最大长度（字符）
+ARTICLE_EXCERPT_LENGTH = 200
+# 补全历史文章摘录时每批处理的数量
+EXCERPT_BACKFILL_BATCH_SIZE = 500
+# 批量插入文章时每条语句包含的文章数量
+ARTICLE_INSERT_BATCH_SIZE = 500
+# 批量插入文章时写入的字段
+ARTICLE_INSERT_FIELDS = (
+    "title", "url", "author", "summary", "content", "excerpt", "image_url",
+    "published_at", "guid", "feed_id", "created_at", "updated_at",
+)
 
 
 async def get_user_feeds(user_id: int) -> List[UserFeed]:
@@ -61,6 +47,16 @@ async def get_user_feeds(user_id: int) -> List[UserFeed]:
     return user_feeds
 
 
+async def get_user_feeds_version(user_id: int) -> List[Tuple]:
+    """
+    获取用户订阅列表的版本信息（订阅和Feed的更新时间以及计数器），用于计算ETag。
+    只读取少量列，不加载完整的Feed记录。
+    """
+    return await UserFeed.filter(user_id=user_id).order_by("id").values_list(
+        "id", "updated_at", "unread_count", "favorite_count", "feed__updated_at"
+    )
+
+
 async def get_feed(feed_id: int, user_id: int) -> Optional[Feed]:
     """
     获取单个订阅源的详细信息，前提是用户已订阅该源。
@@ -105,6 +101,9 @@ async def create_feed(feed_data: dict, user_id: int) -> Feed:
         logger.info(f"数据库中未找到Feed，已创建新的Feed记录: {feed_url}")
         # 如果是新Feed，可以先用用户提供的信息填充，后台任务再更新
         feed.title = feed_data.get("title") or "处理中..."
+        # 首次抓取由 process_new_feed_task 完成；先推迟调度，避免定时调度抢先以非首次抓取的方式处理。
+        # 若该任务丢失，调度器会在推迟时间过后接手
+        feed.next_fetch_at = datetime.now() + timedelta(seconds=settings.FEED_FETCH_LEASE)
         await feed.save()
     else:
         logger.info(f"Feed已存在于数据库中: {feed_url}")
@@ -114,13 +113,15 @@ async def create_feed(feed_data: dict, user_id: int) -> Feed:
         logger.warning(f"用户 {user_id} 尝试重复订阅Feed: {feed_url}")
         raise ValueError("您已经订阅了此Feed")
 
-    # 3. 创建用户与Feed的关联
+    # 3. 创建用户与Feed的关联，已存在的Feed中的文章对新订阅者均为未读
     await UserFeed.create(
         user_id=user_id,
         feed_id=feed.id,
         title_override=feed_data.get("title"),
-        category=feed_data.get("category", FeedCategory.OTHER)
+        category=feed_data.get("category", FeedCategory.OTHER),
+        unread_count=0 if created else await Article.filter(feed_id=feed.id).count()
     )
+    await bump_article_generation([user_id])
     logger.success(f"用户 [{user_id}] 成功订阅Feed: {feed_url}")
 
     return feed
@@ -130,6 +131,9 @@ async def delete_feed(feed_id: int, user_id: int) -> bool:
     """
     删除用户对某个Feed的订阅关系。
 
+    只删除订阅记录，订阅立即从用户的列表中消失；该Feed下的文章交互记录
+    由调用方加入后台任务（purge_feed_interactions_task）分批清理。
+
     Args:
         feed_id: 要取消订阅的Feed的ID。
         user_id: 用户的ID。
@@ -137,134 +141,273 @@ async def delete_feed(feed_id: int, user_id: int) -> bool:
     Returns:
         如果成功删除返回True，否则返回False。
     """
-    try:
-        async with in_transaction():
-            await UserFeed.filter(user_id=user_id, feed_id=feed_id).delete()
-            if article_ids_to_check := await Article.filter(feed_id=feed_id).values_list("id", flat=True):
-                await UserArticle.filter(
-                    user_id=user_id,
-                    article_id__in=article_ids_to_check
-                ).delete()
-            logger.success(f"成功为用户 {user_id} 取消订阅Feed ID: {feed_id}")
-            return True
-    except DoesNotExist:
+    deleted = await UserFeed.filter(user_id=user_id, feed_id=feed_id).delete()
+    if not deleted:
         logger.warning(f"取消订阅失败：用户 {user_id} 未订阅Feed ID {feed_id} 或该Feed不存在。")
         return False
+    await bump_article_generation([user_id])
+    logger.success(f"成功为用户 {user_id} 取消订阅Feed ID: {feed_id}")
+    return True
+
+
+def is_recently_fetched(feed: Feed) -> bool:
+    """
+    判断Feed是否在 FEED_REUSE_MAX_AGE 内成功抓取过，可直接复用已存储的文章。
+    """
+    if not feed.last_fetched:
+        return False
+    age = datetime.now(feed.last_fetched.tzinfo) - feed.last_fetched
+    return age.total_seconds() < settings.FEED_REUSE_MAX_AGE
+
+
+def apply_feed_info(feed: Feed, feed_info: Dict[str, Any]) -> None:
+    """
+    使用解析得到的源信息更新Feed对象的元数据（不保存）。
+    """
+    feed.title = feed_info.get("title") or "未命名订阅源"
+    feed.description = feed_info.get("description")
+    feed.website_url = feed_info.get("website_url")
+    feed.image_url = feed_info.get("image_url")
 
 
 async def fetch_and_save_articles(feed: Feed, is_initial_fetch: bool = False) -> List[Article]:
     """
-    获取并保存文章,并为所有订阅者创建关联记录
+    获取并保存文章，并通知所有订阅者。
+    首次抓取时会同时使用同一份文档更新Feed的元数据，无需再单独解析一次。
     """
-    from api.ws import manager
+    from services.notification_service import new_articles_digest
+    # 从未成功抓取过的Feed（如首次抓取任务之前被调度器处理）同样按首次抓取处理：
+    # 写入元数据，且不为历史文章发送新文章通知
+    is_initial_fetch = is_initial_fetch or feed.last_fetched is None
     try:
-        # 1. 首先获取所有订阅了此Feed的用户ID
-        subscriber_ids = await UserFeed.filter(feed_id=feed.id).values_list('user_id', flat=True)
+        # 1. 以流的方式抓取Feed内容，携带上次保存的校验值发起条件请求
+        headers = build_conditional_headers(feed)
+        async with get_http_client().stream("GET", feed.url, headers=headers) as response:
+            # 内容未变化：跳过解析和数据库写入，仅更新最后获取时间
+            if response.status_code == httpx.codes.NOT_MODIFIED:
+                logger.debug(f"Feed {feed.url} 未发生变化 (304)，跳过解析。")
+                await _mark_unchanged(feed)
+                return []
 
-        # 2. 抓取Feed内容
-        async with httpx.AsyncClient() as client:
-            response = await client.get(feed.url, follow_redirects=True)
             response.raise_for_status()
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+            if settings.FEED_STREAMING_INGEST:
+                # 流式模式：边下载边解析，提前停止时无法得到完整内容哈希
+                content_hash = None
+                feed_data = await stream_feed_entries(response, await get_recent_guids(feed))
+            else:
+                body = await read_capped_body(response)
+                feed_data = None
+
+                # 服务器未提供校验值时，通过内容哈希判断是否变化
+                content_hash = hashlib.sha256(body).hexdigest()
+                if content_hash == feed.content_hash and not is_initial_fetch:
+                    logger.debug(f"Feed {feed.url} 内容哈希未变化，跳过解析。")
+                    await _mark_unchanged(feed)
+                    return []
+
+        if feed_data is None:
+            feed_data = await parse_feed(body, settings.FEED_MAX_ENTRIES)
+        if is_initial_fetch and feed_data["feed"]:
+            apply_feed_info(feed, feed_data["feed"])
+
+        # 2. 获取所有订阅了此Feed的用户ID
+        subscriber_ids = await UserFeed.filter(feed_id=feed.id).values_list('user_id', flat=True)
 
-        feed_data = feedparser.parse(response.content)
-
-        # 3. 筛选并创建新文章
-        newly_created_articles = []
-        for entry in feed_data.entries:
-            guid = entry.get("id", entry.get("link"))
-            if not guid:
-                continue
-
-            existing_article = await Article.get_or_none(guid=guid, feed_id=feed.id)
-            # 如果文章已存在，跳过
-            if existing_article:
-                continue
-
-            published_at = datetime(*entry.published_parsed[:6]) if "published_parsed" in entry else datetime.now()
-
-            article = await Article.create(
-                title=entry.get("title", "无标题"),
-                url=entry.get("link", ""),
-                author=entry.get("author"),
-                summary=entry.get("summary"),
-                content=entry.get("content", [{}])[0].get("value"),
-                image_url=extract_image_url(entry),
-                published_at=published_at,
-                guid=guid,
-                feed=feed
-            )
-            newly_created_articles.append(article)
-
-        # 4. 如果有新文章且订阅者列表不为空，为所有订阅者批量创建关联记录
-        if newly_created_articles and subscriber_ids:
-            user_article_links = [
-                UserArticle(user_id=user_id, article_id=article.id)
-                for article in newly_created_articles
-                for user_id in subscriber_ids
-            ]
-            await UserArticle.bulk_create(user_article_links)
+        # 3. 一次性查询本次条目中已存在的GUID，筛选出新文章
+        entries_by_guid = {}
+        for entry in feed_data["entries"]:
+            guid = entry["guid"]
+            if guid and guid not in entries_by_guid:
+                entries_by_guid[guid] = entry
+
+        known_guids = set(
+            await Article.filter(feed_id=feed.id, guid__in=list(entries_by_guid)).values_list("guid", flat=True)
+        ) if entries_by_guid else set()
+
+        new_articles = [
+            build_article(feed, guid, entry)
+            for guid, entry in select_new_entries(entries_by_guid, known_guids)
+        ]
+
+        # 批量插入新文章；与并发写入或重复链接冲突的行直接忽略，只有本次实际插入的文章计入后续处理
+        newly_created_articles = await insert_articles(new_articles)
+        if newly_created_articles:
+            # 增量更新订阅者的未读数和全文索引
+            await add_unread_for_subscribers(feed.id, len(newly_created_articles))
+            await index_articles(newly_created_articles)
+            # 订阅者的文章列表缓存失效
+            await bump_article_generation(subscriber_ids)
+
+        # 4. 新文章无需为每个订阅者写入关联记录：未读状态由“已订阅且没有已读记录”推导得出，
+        #    UserArticle 只在用户实际交互（阅读、收藏等）时才创建
+        if newly_created_articles and subscriber_ids and not is_initial_fetch:
             feed_title = feed.title or "未命名订阅源"
 
-            # 5. 向订阅者发送新文章通知
-            if not is_initial_fetch:
-                for user_id in subscriber_ids:
-                    await manager.send_personal_message(
-                        {
-                            "type": "new_articles",
-                            "message": f"你订阅的 [{feed_title}-{feed.url}] 有{len(newly_created_articles)}篇新文章发布！",
-                            "feed_id": feed.id,
-                            "count": len(newly_created_articles)
-                        }, user_id
-                    )
-
-        # 6. 更新Feed的最后获取时间
+            # 5. 向订阅者发送新文章通知：合并窗口内的多条通知会汇总为一条摘要
+            await new_articles_digest.add(feed.id, feed_title, len(newly_created_articles), subscriber_ids)
+
+        # 6. 更新Feed的最后获取时间，并保存本次响应的校验值供下次条件请求使用
         feed.last_fetched = datetime.now()
+        feed.etag = etag
+        feed.last_modified = last_modified
+        feed.content_hash = content_hash
+        await schedule_after_success(feed)
         await feed.save()
 
         return newly_created_articles
     except Exception as e:
         logger.exception(f"抓取Feed {feed.url} 失败: {e}")
+        await _record_fetch_failure(feed)
+        return []
+
+
+async def insert_articles(articles: List[Article]) -> List[Article]:
+    """
+    批量插入文章，忽略与已有文章冲突（同一Feed内GUID重复或链接重复）的行。
+
+    使用 INSERT ... ON CONFLICT DO NOTHING RETURNING 得到本次实际插入的文章ID，
+    同一Feed被并发抓取时，另一方插入的文章不会被重复计数、索引和通知。
+
+    Returns:
+        本次实际插入的文章。
+    """
+    inserted_ids = []
+    connection = get_connection()
+    for start in range(0, len(articles), ARTICLE_INSERT_BATCH_SIZE):
+        batch = articles[start:start + ARTICLE_INSERT_BATCH_SIZE]
+        now = datetime.now()
+        values = []
+        for article in batch:
+            article.created_at = article.updated_at = now
+            values.extend(
+                Article._meta.fields_map[name].to_db_value(getattr(article, name), article)
+                for name in ARTICLE_INSERT_FIELDS
+            )
+        params = iter(placeholders(len(values)))
+        rows = ", ".join(
+            "(" + ", ".join(next(params) for _ in ARTICLE_INSERT_FIELDS) + ")" for _ in batch
+        )
+        columns = ", ".join(f'"{name}"' for name in ARTICLE_INSERT_FIELDS)
+        sql = f'INSERT INTO "articles" ({columns}) VALUES {rows} ON CONFLICT DO NOTHING RETURNING "id"'
+        _, result = await connection.execute_query(sql, values)
+        inserted_ids.extend(row["id"] for row in result)
+    if not inserted_ids:
         return []
+    return await Article.filter(id__in=inserted_ids).order_by("id")
+
+
+async def get_recent_guids(feed: Feed) -> Set[str]:
+    """
+    获取Feed最近入库的若干篇文章的GUID，供流式解析判断何时停止。
+    """
+    guids = await Article.filter(feed_id=feed.id).order_by("-published_at").limit(
+        settings.FEED_MAX_ENTRIES
+    ).values_list("guid", flat=True)
+    return set(guids)
+
+
+async def _mark_unchanged(feed: Feed) -> None:
+    """
+    内容未变化时只更新最后获取时间和调度信息，不做任何其他数据库查询。
+    """
+    feed.last_fetched = datetime.now()
+    schedule_unchanged(feed)
+    # updated_at 需显式列出才会刷新，订阅列表的ETag依赖它
+    await feed.save(update_fields=["last_fetched", *SCHEDULE_FIELDS, "updated_at"])
+
+
+def select_new_entries(entries_by_guid: Dict[str, Dict[str, Any]], known_guids: Set[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    从条目中挑选出尚未入库的新条目。
+
+    Feed通常按时间倒序排列，此时遇到第一个已存在的GUID即可停止遍历；
+    若条目并非按发布时间倒序排列，则退回到逐条比对，避免漏掉新文章。
+    """
+    items = list(entries_by_guid.items())
+    published = [entry["published_at"] for _, entry in items if entry["published_at"]]
+    newest_first = all(a >= b for a, b in zip(published, published[1:]))
+
+    if not newest_first:
+        return [(guid, entry) for guid, entry in items if guid not in known_guids]
+
+    new_entries = []
+    for guid, entry in items:
+        if guid in known_guids:
+            break
+        new_entries.append((guid, entry))
+    return new_entries
 
 
-def extract_image_url(entry: Dict[str, Any]) -> Optional[str]:
-    """
-    从Feed条目中提取图片URL
-    """
-    # 尝试从媒体内容中获取图片URL
-    if "media_content" in entry:
-        for media in entry["media_content"]:
-            if "medium" in media and media["medium"] == "image":
-                return media["url"]
-            elif "type" in media and media["type"].startswith("image/"):
-                return media["url"]
-
-    # 尝试从封面图片中获取
-    if "media_thumbnail" in entry and entry["media_thumbnail"]:
-        return entry["media_thumbnail"][0]["url"]
-
-    # 尝试从内容中提取图片URL
-    if "content" in entry and entry["content"]:
-        content = entry["content"][0]["value"]
-        img_start = content.find("<img")
-        if img_start != -1:
-            src_start = content.find("src=\"", img_start)
-            if src_start != -1:
-                src_start += 5
-                src_end = content.find("\"", src_start)
-                if src_end != -1:
-                    return content[src_start:src_end]
-
-    # 如果以上都失败，尝试从摘要中提取
-    if "summary" in entry:
-        content = entry["summary"]
-        img_start = content.find("<img")
-        if img_start != -1:
-            src_start = content.find("src=\"", img_start)
-            if src_start != -1:
-                src_start += 5
-                src_end = content.find("\"", src_start)
-                if src_end != -1:
-                    return content[src_start:src_end]
-
-    return None
+async def _record_fetch_failure(feed: Feed) -> None:
+    """
+    记录抓取失败并按指数退避推迟下次抓取。
+    """
+    schedule_after_failure(feed)
+    try:
+        await feed.save(update_fields=[*SCHEDULE_FIELDS, "updated_at"])
+    except Exception as e:
+        logger.error(f"保存Feed {feed.url} 的退避调度信息失败: {e}")
+
+
+def build_article(feed: Feed, guid: str, entry: Dict[str, Any]) -> Article:
+    """
+    根据规范化后的Feed条目构造（未保存的）文章对象。
+    """
+    return Article(
+        title=entry["title"],
+        url=entry["url"],
+        author=entry["author"],
+        summary=entry["summary"],
+        content=entry["content"],
+        excerpt=build_excerpt(entry["summary"], entry["content"]),
+        image_url=entry["image_url"],
+        published_at=entry["published_at"] or datetime.now(),
+        guid=guid,
+        feed_id=feed.id
+    )
+
+
+def build_excerpt(summary: Optional[str], content: Optional[str]) -> str:
+    """
+    根据摘要（缺失时使用正文）生成纯文本摘录，列表展示时无需再读取和清洗HTML正文。
+    """
+    text = html_to_text(summary or content)
+    if len(text) <= ARTICLE_EXCERPT_LENGTH:
+        return text
+    return text[:ARTICLE_EXCERPT_LENGTH].rstrip() + "..."
+
+
+async def backfill_article_excerpts() -> int:
+    """
+    按主键分批为尚未生成摘录的历史文章补全摘录。
+
+    Returns:
+        补全的文章数量。
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        batch = await Article.filter(excerpt__isnull=True, id__gt=last_id).order_by("id").limit(EXCERPT_BACKFILL_BATCH_SIZE)
+        if not batch:
+            break
+        for article in batch:
+            article.excerpt = build_excerpt(article.summary, article.content)
+        await Article.bulk_update(batch, fields=["excerpt"])
+        updated += len(batch)
+        last_id = batch[-1].id
+    return updated
+
+
+def build_conditional_headers(feed: Feed) -> Dict[str, str]:
+    """
+    根据Feed上次保存的ETag/Last-Modified构造条件请求头。
+    """
+    headers = {}
+    if feed.etag:
+        headers["If-None-Match"] = feed.etag
+    if feed.last_modified:
+        headers["If-Modified-Since"] = feed.last_modified
+    return headers
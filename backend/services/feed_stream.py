@@ -0,0 +1,181 @@
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Set, Dict, Any
+
+import httpx
+from loguru import logger
+
+from core.config import settings
+from services.feed_parser import parse_feed
+
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+# 每累计多少个条目就交给feedparser解析一次
+STREAM_PARSE_BATCH_SIZE = 50
+
+
+def _local_name(tag: str) -> str:
+    """去掉ElementTree标签中的命名空间部分。"""
+    return tag.rsplit("}", 1)[-1]
+
+
+async def read_capped_body(response: httpx.Response, max_bytes: int = settings.FEED_MAX_BYTES) -> bytes:
+    """
+    以流的方式读取响应体，超过 max_bytes 时中止下载。
+
+    Raises:
+        ValueError: 响应体超过大小上限。
+    """
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ValueError(f"Feed响应体过大: {content_length} 字节，上限 {max_bytes} 字节")
+
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise ValueError(f"Feed响应体超过上限 {max_bytes} 字节，已中止下载")
+    return bytes(body)
+
+
+class StreamingFeedSplitter:
+    """
+    增量读取RSS/Atom文档，把已完整到达的<item>/<entry>元素切分出来。
+
+    条目被取出后会立即从文档树中移除，因此内存占用只与尚未处理的条目数量有关，
+    与整个文档的大小无关。切分出的条目会被重新包装成小文档交给feedparser解析，
+    以保持与非流式模式完全一致的规范化和HTML清洗结果。
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List[ET.Element] = []
+        self._header: List[str] = []
+        self._items: List[str] = []
+        self.is_atom = False
+        self.header_consumed = False
+
+    def feed(self, chunk: bytes) -> None:
+        """输入一段数据并切分出其中已完整的条目。"""
+        self._parser.feed(chunk)
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if not self._stack and element.tag == f"{{{ATOM_NAMESPACE}}}feed":
+                    self.is_atom = True
+                self._stack.append(element)
+                continue
+
+            self._stack.pop()
+            parent = self._stack[-1] if self._stack else None
+            name = _local_name(element.tag)
+            if name in ("item", "entry"):
+                self._items.append(ET.tostring(element, encoding="unicode"))
+                if parent is not None:
+                    parent.remove(element)
+            elif parent is not None and _local_name(parent.tag) in ("channel", "feed") and not self.header_consumed:
+                # 频道级别的元数据（标题、链接、描述等），体积很小
+                self._header.append(ET.tostring(element, encoding="unicode"))
+                parent.remove(element)
+
+    @property
+    def pending(self) -> int:
+        """已切分但尚未取走的条目数量。"""
+        return len(self._items)
+
+    def take_document(self) -> Optional[bytes]:
+        """把已切分出的条目（首次还包括频道元数据）包装成可供feedparser解析的小文档。"""
+        if not self._items and (self.header_consumed or not self._header):
+            return None
+
+        body = "".join(self._header if not self.header_consumed else []) + "".join(self._items)
+        self._items = []
+        self._header = []
+        self.header_consumed = True
+
+        if self.is_atom:
+            document = f'<feed xmlns="{ATOM_NAMESPACE}">{body}</feed>'
+        else:
+            document = f'<rss version="2.0"><channel>{body}</channel></rss>'
+        return document.encode("utf-8")
+
+
+async def stream_feed_entries(response: httpx.Response, known_guids: Set[str]) -> Dict[str, Any]:
+    """
+    流式下载并增量解析Feed。
+    达到 FEED_MAX_ENTRIES 条，或在按时间倒序的条目中遇到第一个已知GUID时立即停止，
+    剩余的响应体不再下载。
+
+    在第一批条目成功切分之前会保留已读取的原始数据：若文档不是严格的XML（例如包含HTML实体），
+    则退回到完整读取后交给feedparser的容错解析。
+
+    Args:
+        response: 已发起的流式响应。
+        known_guids: 该Feed最近已入库的GUID集合。
+
+    Returns:
+        与 parse_feed 相同结构的解析结果。
+    """
+    splitter = StreamingFeedSplitter()
+    raw: Optional[bytearray] = bytearray()
+    received = 0
+    feed_info = None
+    entries: List[Dict[str, Any]] = []
+    last_published = None
+    newest_first = True
+
+    async def drain() -> bool:
+        """解析已切分出的条目，返回是否应当停止读取。"""
+        nonlocal feed_info, last_published, newest_first
+        document = splitter.take_document()
+        if document is None:
+            return False
+        parsed = await parse_feed(document)
+        feed_info = feed_info or parsed["feed"]
+        for entry in parsed["entries"]:
+            published = entry["published_at"]
+            if published and last_published and published > last_published:
+                newest_first = False
+            last_published = published or last_published
+
+            if newest_first and entry["guid"] in known_guids:
+                logger.debug(f"遇到已入库的GUID，停止读取剩余内容: {entry['guid']}")
+                return True
+            entries.append(entry)
+            if len(entries) >= settings.FEED_MAX_ENTRIES:
+                logger.debug(f"已达到单次抓取条目上限 {settings.FEED_MAX_ENTRIES}，停止读取剩余内容。")
+                return True
+        return False
+
+    fallback = False
+    stopped = False
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if received > settings.FEED_MAX_BYTES:
+            logger.warning(f"Feed响应体超过上限 {settings.FEED_MAX_BYTES} 字节，只处理已读取的部分。")
+            break
+        if raw is not None:
+            raw.extend(chunk)
+        if fallback:
+            continue
+
+        try:
+            splitter.feed(chunk)
+        except ET.ParseError as e:
+            if raw is None:
+                logger.warning(f"流式解析Feed时遇到错误，只处理已读取的部分: {e}")
+                break
+            logger.info(f"Feed不是严格的XML，退回到完整解析: {e}")
+            fallback = True
+            continue
+
+        if splitter.pending:
+            # 已成功切分出条目，此后不再需要保留原始数据
+            raw = None
+        if splitter.pending >= STREAM_PARSE_BATCH_SIZE and await drain():
+            stopped = True
+            break
+
+    if fallback:
+        return await parse_feed(bytes(raw), settings.FEED_MAX_ENTRIES)
+    if not stopped:
+        await drain()
+
+    return {"feed": feed_info, "entries": entries, "bozo_exception": None}
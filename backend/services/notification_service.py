@@ -0,0 +1,83 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from api.ws import manager
+from core.config import settings
+
+
+class NewArticlesDigest:
+    """
+    合并短时间内的新文章通知。
+
+    一次刷新周期中，订阅了大量Feed的用户可能在几秒内收到上百条 new_articles 消息。
+    通知先按Feed累积，合并窗口结束后按用户汇总成一条包含各Feed数量的摘要；
+    摘要内容相同的用户共用一次发布。
+    """
+
+    def __init__(self, window: float = settings.WS_DIGEST_WINDOW):
+        self.window = window
+        # {feed_id: (feed_title, 新文章数, 订阅者ID集合)}
+        self._pending: Dict[int, Tuple[str, int, set]] = {}
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, feed_id: int, feed_title: str, count: int, user_ids: Iterable[int]):
+        """记录一个Feed的新文章，合并窗口结束时统一发送。"""
+        user_ids = set(user_ids)
+        if not user_ids or count <= 0:
+            return
+        if self.window <= 0:
+            self._pending[feed_id] = (feed_title, count, user_ids)
+            await self.flush()
+            return
+
+        _, previous_count, previous_users = self._pending.get(feed_id, (feed_title, 0, set()))
+        self._pending[feed_id] = (feed_title, previous_count + count, previous_users | user_ids)
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.exception(f"发送新文章通知摘要失败: {e}")
+
+    async def flush(self):
+        """立即发送所有累积的通知。"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        # 按用户汇总其订阅的Feed，再按摘要内容分组，内容相同的用户只发布一次
+        feeds_by_user: Dict[int, List[int]] = defaultdict(list)
+        for feed_id, (_, _, user_ids) in pending.items():
+            for user_id in user_ids:
+                feeds_by_user[user_id].append(feed_id)
+        users_by_feeds: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+        for user_id, feed_ids in feeds_by_user.items():
+            users_by_feeds[tuple(sorted(feed_ids))].append(user_id)
+
+        for feed_ids, user_ids in users_by_feeds.items():
+            await manager.send_to_users(build_digest_message(feed_ids, pending), user_ids)
+        logger.debug(f"已发送新文章通知摘要：{len(pending)} 个订阅源，{len(feeds_by_user)} 个用户，{len(users_by_feeds)} 次发布")
+
+
+def build_digest_message(feed_ids: Tuple[int, ...], pending: Dict[int, Tuple[str, int, set]]) -> Dict:
+    """
+    构造新文章摘要消息。feeds 中包含每个Feed的新文章数；只涉及一个Feed时同时保留 feed_id 字段。
+    """
+    feeds = [{"feed_id": feed_id, "feed_title": pending[feed_id][0], "count": pending[feed_id][1]} for feed_id in feed_ids]
+    total = sum(feed["count"] for feed in feeds)
+    message = {"type": "new_articles", "count": total, "feeds": feeds}
+    if len(feeds) == 1:
+        message["feed_id"] = feeds[0]["feed_id"]
+        message["message"] = f"你订阅的 [{feeds[0]['feed_title']}] 有{total}篇新文章发布！"
+    else:
+        message["message"] = f"你订阅的 {len(feeds)} 个订阅源有{total}篇新文章发布！"
+    return message
+
+
+new_articles_digest = NewArticlesDigest()
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Callable, Awaitable, List, Optional, Tuple
+
+from loguru import logger
+from tortoise.expressions import Subquery
+
+from db.sql import get_connection
+from models import User, Article, UserArticle, UserFeed
+from services.counter_service import recalculate_feed_counters
+from services.read_position_service import discard_user_read_positions
+
+# 每批删除的交互记录数量，单条DELETE语句只锁定这一批行
+PURGE_BATCH_SIZE = 1000
+
+
+def _deadline(time_budget: Optional[float]) -> Optional[float]:
+    """根据时间预算（秒）计算截止时间，None 表示不限时。"""
+    return time.monotonic() + time_budget if time_budget is not None else None
+
+
+async def _delete_interactions_in_batches(
+        query,
+        label: str,
+        should_abort: Optional[Callable[[], Awaitable[bool]]] = None,
+        deadline: Optional[float] = None,
+) -> Tuple[int, bool]:
+    """
+    按主键分批删除交互记录，每批是一条独立的短语句，批次之间让出事件循环。
+
+    Args:
+        query: UserArticle 的查询，描述要删除的记录。
+        label: 日志中显示的任务描述。
+        should_abort: 可选，每批之前调用，返回True时中止删除。
+        deadline: 可选，time.monotonic() 的截止时间，超过后停止删除，由调用方稍后继续。
+
+    Returns:
+        (删除的记录数, 是否已全部删除)。被中止或超过截止时间时第二项为False。
+    """
+    deleted = 0
+    while True:
+        if should_abort and await should_abort():
+            logger.info(f"{label}：已中止，此前删除了 {deleted} 条交互记录。")
+            return deleted, False
+        if deadline is not None and time.monotonic() > deadline:
+            logger.info(f"{label}：超出本次执行的时间预算，已删除 {deleted} 条交互记录，稍后继续。")
+            return deleted, False
+        ids = await query.order_by("id").limit(PURGE_BATCH_SIZE).values_list("id", flat=True)
+        if not ids:
+            break
+        deleted += await UserArticle.filter(id__in=list(ids)).delete()
+        logger.debug(f"{label}：已删除 {deleted} 条交互记录。")
+        await asyncio.sleep(0)
+    return deleted, True
+
+
+async def purge_feed_interactions(user_id: int, feed_id: int, time_budget: Optional[float] = None) -> bool:
+    """
+    取消订阅后清理用户在该Feed下的文章交互记录。
+
+    如果用户在清理完成前重新订阅了该Feed，则停止删除并重新计算该用户的计数器，
+    保留尚未删除的已读、收藏状态。
+
+    Args:
+        time_budget: 可选，本次执行的时间预算（秒），超出后停止，需再次调用以继续。
+
+    Returns:
+        是否已处理完毕。超出时间预算时返回False。
+    """
+    label = f"清理用户 {user_id} 在Feed {feed_id} 下的交互记录"
+    query = UserArticle.filter(
+        user_id=user_id,
+        article_id__in=Subquery(Article.filter(feed_id=feed_id).values("id"))
+    )
+
+    async def resubscribed() -> bool:
+        return await UserFeed.filter(user_id=user_id, feed_id=feed_id).exists()
+
+    deleted, finished = await _delete_interactions_in_batches(
+        query, label, should_abort=resubscribed, deadline=_deadline(time_budget)
+    )
+    if not finished:
+        if await resubscribed():
+            await recalculate_feed_counters(user_id)
+            return True
+        return False
+    logger.info(f"{label}完成，共删除 {deleted} 条。")
+    return True
+
+
+async def purge_user(user_id: int, time_budget: Optional[float] = None) -> bool:
+    """
+    分批删除已注销用户的全部数据，最后删除用户本身。
+    只处理已停用的用户，避免误删仍在使用的账户。
+
+    Args:
+        time_budget: 可选，本次执行的时间预算（秒），超出后停止，需再次调用以继续。
+
+    Returns:
+        是否已处理完毕（用户已删除、不存在或无需清理）。超出时间预算时返回False。
+    """
+    user = await User.get_or_none(id=user_id)
+    if not user:
+        return True
+    if user.is_active:
+        logger.warning(f"跳过清理用户 {user_id}：该用户仍处于激活状态。")
+        return True
+
+    label = f"清理用户 {user_id} 的数据"
+    deleted, finished = await _delete_interactions_in_batches(
+        UserArticle.filter(user_id=user_id), label, deadline=_deadline(time_budget)
+    )
+    if not finished:
+        return False
+    subscriptions = await UserFeed.filter(user_id=user_id).delete()
+    # 缓冲区中尚未写回的阅读位置不再需要
+    await discard_user_read_positions(user_id)
+    # 剩余的关联数据已很少，级联删除不会长时间锁表
+    await user.delete()
+    logger.success(f"{label}完成：删除交互记录 {deleted} 条，订阅 {subscriptions} 个。")
+    return True
+
+
+async def find_unfinished_purges() -> Tuple[List[int], List[Tuple[int, int]]]:
+    """
+    查找未清理完毕的数据：已注销但尚未删除的用户，以及已取消订阅的Feed下残留的交互记录。
+    用于定时补偿中断或失败的清理任务。
+
+    Returns:
+        (待清理的用户ID列表, 待清理的 (用户ID, FeedID) 列表)。
+    """
+    user_ids = await User.filter(is_active=False).values_list("id", flat=True)
+    rows = await get_connection().execute_query_dict(
+        """
+        SELECT DISTINCT ua."user_id", a."feed_id"
+        FROM "user_articles" ua
+        JOIN "articles" a ON a."id" = ua."article_id"
+        JOIN "users" u ON u."id" = ua."user_id" AND u."is_active" = TRUE
+        WHERE NOT EXISTS (
+            SELECT 1 FROM "user_feeds" uf WHERE uf."user_id" = ua."user_id" AND uf."feed_id" = a."feed_id"
+        )
+        """
+    )
+    return list(user_ids), [(row["user_id"], row["feed_id"]) for row in rows]
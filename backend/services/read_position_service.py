@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from loguru import logger
+from redis.exceptions import ResponseError, WatchError
+from tortoise.exceptions import IntegrityError
+
+from core.redis import get_redis
+from models import Article, UserArticle, UserFeed
+from services.cache_service import bump_article_generation
+
+# 待写入的阅读位置：field 为 "{user_id}:{article_id}"，value 为最新位置，同一篇文章只保留最后一次
+PENDING_KEY = "read_positions:pending"
+# 正在写入数据库的一批阅读位置。写入失败时保留，下一次刷新会先重试这一批
+FLUSHING_KEY = "read_positions:flushing"
+# 写回锁，保证同一时间只有一次写回在处理写入中的批次
+FLUSH_LOCK_KEY = "read_positions:flush_lock"
+# 写回锁的过期时间（秒），防止持有锁的进程异常退出后无法再写回
+FLUSH_LOCK_TIMEOUT = 300
+# 每次写入数据库的批大小
+FLUSH_BATCH_SIZE = 500
+
+
+def _field(user_id: int, article_id: int) -> str:
+    return f"{user_id}:{article_id}"
+
+
+async def buffer_read_positions(user_id: int, positions: Dict[int, int]) -> bool:
+    """
+    将用户若干文章的阅读位置写入缓冲区，由定时任务批量写回数据库。
+
+    Args:
+        user_id: 用户ID。
+        positions: {文章ID: 阅读位置}。
+
+    Returns:
+        是否写入成功。Redis不可用时返回False，调用方应直接写数据库。
+    """
+    if not positions:
+        return True
+    try:
+        await get_redis().hset(
+            PENDING_KEY, mapping={_field(user_id, article_id): position for article_id, position in positions.items()}
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"写入阅读位置缓冲区失败，改为直接写入数据库: {e}")
+        return False
+
+
+async def get_buffered_read_position(user_id: int, article_id: int) -> Optional[int]:
+    """
+    读取尚未写回数据库的阅读位置，没有或Redis不可用时返回None。
+    """
+    field = _field(user_id, article_id)
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.hget(PENDING_KEY, field)
+            pipe.hget(FLUSHING_KEY, field)
+            pending, flushing = await pipe.execute()
+    except Exception as e:
+        logger.warning(f"读取阅读位置缓冲区失败: {e}")
+        return None
+    value = pending if pending is not None else flushing
+    return int(value) if value is not None else None
+
+
+async def _filter_subscribed(chunk: List[Tuple[Tuple[int, int], int]]) -> List[UserArticle]:
+    """
+    只保留文章仍存在、且用户仍订阅该文章所属Feed的阅读位置。
+    已注销或取消订阅的用户缓冲的位置会被丢弃，避免写入时违反外键约束。
+    """
+    feed_by_article = dict(
+        await Article.filter(id__in={article_id for (_, article_id), _ in chunk}).values_list("id", "feed_id")
+    )
+    subscriptions = set(
+        await UserFeed.filter(
+            user_id__in={user_id for (user_id, _), _ in chunk}, feed_id__in=set(feed_by_article.values())
+        ).values_list("user_id", "feed_id")
+    ) if feed_by_article else set()
+    return [
+        UserArticle(user_id=user_id, article_id=article_id, read_position=position)
+        for (user_id, article_id), position in chunk
+        if (user_id, feed_by_article.get(article_id)) in subscriptions
+    ]
+
+
+async def _write_positions(positions: Dict[str, str]) -> int:
+    """
+    将一批阅读位置以 upsert 方式写回数据库，忽略已被删除的文章和已失效的订阅。
+    单个分块写入失败时记录日志并丢弃该分块，不影响其他分块，也不会让整批反复重试。
+    """
+    parsed = {}
+    for field, value in positions.items():
+        user_id, article_id = field.split(":")
+        parsed[(int(user_id), int(article_id))] = int(value)
+
+    items = list(parsed.items())
+    written = 0
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[start:start + FLUSH_BATCH_SIZE]
+        rows = await _filter_subscribed(chunk)
+        if not rows:
+            continue
+        try:
+            await UserArticle.bulk_create(
+                rows, on_conflict=["user_id", "article_id"], update_fields=["read_position", "updated_at"]
+            )
+            written += len(rows)
+        except IntegrityError as e:
+            logger.warning(f"写回 {len(rows)} 条阅读位置失败，已丢弃: {e}")
+    return written
+
+
+async def discard_user_read_positions(user_id: int) -> None:
+    """
+    删除用户在缓冲区中尚未写回的阅读位置，在清理已注销用户时调用。
+    """
+    redis = get_redis()
+    try:
+        for key in (PENDING_KEY, FLUSHING_KEY):
+            fields = [field async for field, _ in redis.hscan_iter(key, match=f"{user_id}:*")]
+            if fields:
+                await redis.hdel(key, *fields)
+    except Exception as e:
+        logger.warning(f"清除用户 {user_id} 缓冲的阅读位置失败: {e}")
+
+
+async def _release_flush_lock(redis, token: str) -> None:
+    """只释放自己持有的写回锁，锁已过期并被其他进程获取时不做处理。"""
+    async with redis.pipeline() as pipe:
+        try:
+            await pipe.watch(FLUSH_LOCK_KEY)
+            if await pipe.get(FLUSH_LOCK_KEY) == token:
+                pipe.multi()
+                pipe.delete(FLUSH_LOCK_KEY)
+                await pipe.execute()
+        except WatchError:
+            pass
+
+
+async def flush_read_positions() -> int:
+    """
+    将缓冲区中的阅读位置批量写回数据库。
+
+    先把待写入的哈希原子地重命名为写入中的批次，新的位置更新会写入新的哈希，
+    不会在写库期间丢失；写入成功后再删除该批次。
+    整个过程持有写回锁：上一次写回尚未结束时跳过本次，
+    避免新一批位置被重命名进尚未删除的批次后随之被删除。
+
+    Returns:
+        写入数据库的记录数。
+    """
+    redis = get_redis()
+    token = uuid4().hex
+    if not await redis.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        logger.debug("上一次阅读位置写回尚未结束，跳过本次写回。")
+        return 0
+    try:
+        return await _flush_pending_positions(redis)
+    finally:
+        await _release_flush_lock(redis, token)
+
+
+async def _flush_pending_positions(redis) -> int:
+    """写回一批阅读位置，调用方需持有写回锁。"""
+    if not await redis.exists(FLUSHING_KEY):
+        try:
+            await redis.rename(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # 没有待写入的阅读位置
+            return 0
+
+    positions = await redis.hgetall(FLUSHING_KEY)
+    written = await _write_positions(positions) if positions else 0
+    await redis.delete(FLUSHING_KEY)
+    # 完整视图的文章列表包含阅读位置，写回后使相关用户的列表缓存失效
+    await bump_article_generation({int(field.split(":")[0]) for field in positions})
+    if written:
+        logger.debug(f"已将 {written} 条阅读位置写回数据库。")
+    return written
@@ -0,0 +1,129 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from loguru import logger
+from tortoise.expressions import Q
+
+from core.config import settings
+from models import Feed
+from services.feed_service import fetch_and_save_articles
+
+
+async def iter_feed_batches(*filters: Q, batch_size: int = settings.FEED_REFRESH_BATCH_SIZE) -> AsyncIterator[List[Feed]]:
+    """
+    按主键游标分批从数据库中读取Feed，避免一次性加载全部记录。
+
+    Args:
+        filters: 额外的过滤条件。
+        batch_size: 每批读取的数量。
+
+    Yields:
+        每批Feed对象组成的列表。
+    """
+    last_id = 0
+    while True:
+        batch = await Feed.filter(*filters, id__gt=last_id).order_by("id").limit(batch_size)
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+class FeedRefresher:
+    """
+    并发刷新Feed的执行器。
+    同时受全局并发上限和单主机并发上限约束，单个慢速站点不会拖慢其他站点。
+    """
+
+    def __init__(
+            self,
+            concurrency: int = settings.FEED_REFRESH_CONCURRENCY,
+            per_host: int = settings.FEED_REFRESH_PER_HOST
+    ):
+        self._global_limit = asyncio.Semaphore(concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self.total = 0
+        self.failed = 0
+        self.new_articles = 0
+
+    async def refresh(self, feed: Feed) -> None:
+        """在并发限制内刷新单个Feed，异常只记录不抛出。"""
+        host = urlsplit(feed.url).hostname or ""
+        # 先占用主机配额再占用全局配额，等待同一主机的任务不会占住全局并发槽
+        async with self._host_limits[host], self._global_limit:
+            try:
+                articles = await fetch_and_save_articles(feed)
+                self.new_articles += len(articles)
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"更新订阅源 [{feed.title}-{feed.url}] 时出错: {e}")
+            finally:
+                self.total += 1
+
+    async def run(
+            self,
+            *filters: Q,
+            on_batch: Optional[Callable[[List[Feed]], Awaitable[None]]] = None
+    ) -> Dict[str, int]:
+        """
+        流式读取符合条件的Feed并并发刷新。
+        挂起中的任务数量以批大小为上限，内存占用不随Feed总数增长。
+
+        Args:
+            filters: 选择待刷新Feed的过滤条件，为空则刷新全部。
+            on_batch: 可选，每批Feed被调度前执行的回调（如领取租约）。
+
+        Returns:
+            本次刷新的统计信息。
+        """
+        max_pending = max(settings.FEED_REFRESH_BATCH_SIZE, 1)
+        pending: Set[asyncio.Task] = set()
+
+        async for batch in iter_feed_batches(*filters):
+            if on_batch:
+                await on_batch(batch)
+            for feed in batch:
+                while len(pending) >= max_pending:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.add(asyncio.create_task(self.refresh(feed)))
+
+        if pending:
+            await asyncio.wait(pending)
+
+        return {"total": self.total, "failed": self.failed, "new_articles": self.new_articles}
+
+
+async def refresh_feeds(*filters: Q) -> Dict[str, int]:
+    """
+    使用新的FeedRefresher并发刷新符合条件的Feed。
+
+    Args:
+        filters: 选择待刷新Feed的过滤条件，为空则刷新全部。
+
+    Returns:
+        本次刷新的统计信息。
+    """
+    return await FeedRefresher().run(*filters)
+
+
+async def _lease_feeds(batch: List[Feed]) -> None:
+    """
+    领取一批到期的Feed：临时推迟其下次抓取时间，
+    避免耗时较长的调度周期与下一个周期重复抓取同一批Feed。
+    """
+    lease_until = datetime.now() + timedelta(seconds=settings.FEED_FETCH_LEASE)
+    await Feed.filter(id__in=[feed.id for feed in batch]).update(next_fetch_at=lease_until)
+
+
+async def refresh_due_feeds() -> Dict[str, int]:
+    """
+    只刷新已经到达计划抓取时间（或尚未调度过）的Feed。
+
+    Returns:
+        本次刷新的统计信息。
+    """
+    due = Q(next_fetch_at__isnull=True) | Q(next_fetch_at__lte=datetime.now())
+    return await FeedRefresher().run(due, on_batch=_lease_feeds)
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from loguru import logger
+from tortoise.expressions import F, Q, Subquery
+from tortoise.functions import Count
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+
+from core.config import settings
+from db.sql import get_connection, is_postgres
+from models import Feed, Article, UserArticle, UserFeed
+from services.cache_service import bump_article_generation
+from services.counter_service import apply_counter_delta
+from services.refresh_service import iter_feed_batches
+from services.search_service import get_search_backend
+
+# 每批删除的文章数量
+RETENTION_BATCH_SIZE = 500
+
+
+def resolve_retention(feed: Feed) -> Tuple[int, int]:
+    """
+    获取Feed生效的保留策略，Feed未单独设置时使用全局配置。
+
+    Returns:
+        (保留天数, 最多保留的文章数量)，0 表示不限。
+    """
+    days = feed.retention_days if feed.retention_days is not None else settings.ARTICLE_RETENTION_DAYS
+    max_items = feed.retention_max_items if feed.retention_max_items is not None else settings.ARTICLE_RETENTION_MAX_ITEMS
+    return days, max_items
+
+
+async def _nth_newest_id(feed_id: int, n: int) -> Optional[int]:
+    """按入库顺序返回Feed中第 n 新的文章ID，文章不足 n 篇时返回None。"""
+    ids = await Article.filter(feed_id=feed_id).order_by("-id").offset(n - 1).limit(1).values_list("id", flat=True)
+    return ids[0] if ids else None
+
+
+async def _expired_articles(feed: Feed, days: int, max_items: int) -> Optional[QuerySet[Article]]:
+    """
+    构造Feed中超出保留策略的文章查询，被任何用户收藏或标记为稍后读的文章不在其中。
+    没有需要清理的范围时返回None。
+    """
+    conditions = []
+    if days > 0:
+        expired = Q(created_at__lt=datetime.now() - timedelta(days=days))
+        if settings.ARTICLE_RETENTION_MIN_ITEMS > 0:
+            boundary = await _nth_newest_id(feed.id, settings.ARTICLE_RETENTION_MIN_ITEMS)
+            expired = expired & Q(id__lt=boundary) if boundary is not None else None
+        if expired is not None:
+            conditions.append(expired)
+    if max_items > 0:
+        boundary = await _nth_newest_id(feed.id, max_items)
+        if boundary is not None:
+            conditions.append(Q(id__lt=boundary))
+    if not conditions:
+        return None
+
+    protected = UserArticle.filter(Q(is_favorite=True) | Q(read_later=True)).values("article_id")
+    return Article.filter(Q(*conditions, join_type="OR"), feed_id=feed.id).exclude(id__in=Subquery(protected))
+
+
+async def _delete_articles(feed_id: int, article_ids: List[int]) -> None:
+    """
+    删除一批文章及其交互记录，并同步调整订阅者的未读数：
+    先按整批减少，再为已读过其中文章的用户加回已读的数量。
+    """
+    read_counts = await UserArticle.filter(article_id__in=article_ids, is_read=True).annotate(
+        count=Count("id")
+    ).group_by("user_id").values("user_id", "count")
+
+    async with in_transaction():
+        await UserFeed.filter(feed_id=feed_id).update(unread_count=F("unread_count") - len(article_ids))
+        for row in read_counts:
+            await apply_counter_delta(row["user_id"], feed_id, unread_delta=row["count"])
+        await UserArticle.filter(article_id__in=article_ids).delete()
+        await Article.filter(id__in=article_ids).delete()
+
+    backend = get_search_backend()
+    if backend.available:
+        try:
+            await backend.remove_articles(article_ids)
+        except Exception as e:
+            logger.warning(f"从全文索引中移除已清理的文章失败: {e}")
+
+
+async def apply_feed_retention(feed: Feed) -> int:
+    """
+    按保留策略分批清理单个Feed的文章。
+
+    Returns:
+        删除的文章数量。
+    """
+    days, max_items = resolve_retention(feed)
+    query = await _expired_articles(feed, days, max_items)
+    if query is None:
+        return 0
+
+    deleted = 0
+    while True:
+        ids = list(await query.order_by("id").limit(RETENTION_BATCH_SIZE).values_list("id", flat=True))
+        if not ids:
+            break
+        await _delete_articles(feed.id, ids)
+        deleted += len(ids)
+        await asyncio.sleep(0)
+
+    if deleted:
+        await bump_article_generation(await UserFeed.filter(feed_id=feed.id).values_list("user_id", flat=True))
+        logger.info(f"Feed [{feed.id}] 按保留策略清理了 {deleted} 篇文章。")
+    return deleted
+
+
+async def compact_article_tables() -> None:
+    """
+    大量删除后更新统计信息并整理索引，使查询计划和索引大小与实际数据保持一致。
+    """
+    connection = get_connection()
+    search_available = get_search_backend().available
+    try:
+        if is_postgres():
+            # VACUUM 不能在事务或多语句脚本中执行，逐表单独执行；不使用 FULL，不会阻塞读写
+            tables = ["articles", "user_articles"] + (["article_search"] if search_available else [])
+            for table in tables:
+                await connection.execute_script(f'VACUUM (ANALYZE) "{table}"')
+        else:
+            if search_available:
+                await connection.execute_script('INSERT INTO "article_fts" ("article_fts") VALUES (\'optimize\')')
+            await connection.execute_script("PRAGMA optimize")
+    except Exception as e:
+        logger.warning(f"整理文章相关表失败: {e}")
+
+
+async def apply_retention_policy() -> int:
+    """
+    对全部Feed执行文章保留策略，清理后整理相关表和索引。
+
+    Returns:
+        删除的文章总数。
+    """
+    deleted = 0
+    async for feeds in iter_feed_batches():
+        for feed in feeds:
+            deleted += await apply_feed_retention(feed)
+    if deleted:
+        await compact_article_tables()
+    logger.info(f"文章保留策略执行完成，共清理 {deleted} 篇文章")
+    return deleted
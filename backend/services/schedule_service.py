@@ -0,0 +1,84 @@
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.config import settings
+from models import Feed, Article
+
+# 估算发布频率时参考的最近文章数量
+PUBLISH_RATE_SAMPLE_SIZE = 10
+# 内容未变化时抓取间隔的增长倍数，长期不更新的Feed会逐渐降低抓取频率
+UNCHANGED_INTERVAL_GROWTH = 1.2
+
+
+def _now_like(value: Optional[datetime]) -> datetime:
+    """返回与给定时间同时区（或同为naive）的当前时间，便于相减。"""
+    return datetime.now(value.tzinfo) if value is not None else datetime.now()
+
+
+def _clamp_interval(seconds: float) -> int:
+    """将抓取间隔限制在配置的上下限之间。"""
+    return int(min(max(seconds, settings.FEED_MIN_FETCH_INTERVAL), settings.FEED_MAX_FETCH_INTERVAL))
+
+
+def with_jitter(seconds: float) -> float:
+    """为抓取间隔添加随机抖动，避免大量Feed在同一时刻到期。"""
+    jitter = settings.FEED_FETCH_JITTER
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+async def estimate_fetch_interval(feed: Feed) -> int:
+    """
+    根据Feed最近文章的发布时间估算合适的抓取间隔。
+
+    以最近若干篇文章（加上距今的空窗期）的平均发布间隔为基准，按其一半进行轮询，
+    这样长期不更新的Feed会自然拉长间隔，频繁更新的Feed会缩短间隔。
+
+    Args:
+        feed: 要估算的Feed对象。
+
+    Returns:
+        抓取间隔（秒）。
+    """
+    published = await Article.filter(
+        feed_id=feed.id, published_at__isnull=False
+    ).order_by("-published_at").limit(PUBLISH_RATE_SAMPLE_SIZE).values_list("published_at", flat=True)
+
+    if len(published) < 2:
+        return settings.FEED_DEFAULT_FETCH_INTERVAL
+
+    span = (_now_like(published[-1]) - published[-1]).total_seconds()
+    average_gap = span / len(published)
+    return _clamp_interval(average_gap / 2)
+
+
+async def schedule_after_success(feed: Feed) -> None:
+    """
+    抓取成功后重新学习抓取间隔，重置失败计数，并设置下次抓取时间。
+    仅修改对象属性，由调用方负责保存。
+    """
+    feed.fetch_interval = await estimate_fetch_interval(feed)
+    feed.error_count = 0
+    feed.next_fetch_at = datetime.now() + timedelta(seconds=with_jitter(feed.fetch_interval))
+
+
+def schedule_unchanged(feed: Feed) -> None:
+    """
+    内容未变化（304或内容哈希相同）时，适度拉长抓取间隔并设置下次抓取时间。
+    不查询数据库，仅修改对象属性，由调用方负责保存。
+    """
+    base_interval = feed.fetch_interval or settings.FEED_DEFAULT_FETCH_INTERVAL
+    feed.fetch_interval = _clamp_interval(base_interval * UNCHANGED_INTERVAL_GROWTH)
+    feed.error_count = 0
+    feed.next_fetch_at = datetime.now() + timedelta(seconds=with_jitter(feed.fetch_interval))
+
+
+def schedule_after_failure(feed: Feed) -> None:
+    """
+    抓取失败后按指数退避推迟下次抓取时间。
+    仅修改对象属性，由调用方负责保存。
+    """
+    feed.error_count = (feed.error_count or 0) + 1
+    base_interval = feed.fetch_interval or settings.FEED_DEFAULT_FETCH_INTERVAL
+    backoff = min(base_interval * (2 ** feed.error_count), settings.FEED_MAX_FETCH_INTERVAL)
+    feed.next_fetch_at = datetime.now() + timedelta(seconds=with_jitter(backoff))
@@ -0,0 +1,376 @@
+import html
+import re
+from typing import List, Optional, Tuple, Iterable
+
+from loguru import logger
+
+from core.config import settings
+from db.sql import get_connection, is_postgres
+from models import Article
+
+# 写入索引的单个字段最大长度（字符），避免超长正文撑爆 tsvector
+SEARCH_MAX_TEXT_LENGTH = 100_000
+# 重建索引时每批处理的文章数量
+SEARCH_REBUILD_BATCH_SIZE = 500
+# 搜索结果摘要片段的长度（字符）
+SNIPPET_LENGTH = 160
+# 选择摘要片段位置时最多考察的匹配数量
+SNIPPET_MAX_MATCHES = 50
+
+# 中日韩文字区间
+_CJK_RANGES = "぀-ヿ㐀-䶿一-鿿豈-﫿가-힯"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK_RANGES}]+|[^\W_{_CJK_RANGES}]+")
+_CJK_PATTERN = re.compile(rf"[{_CJK_RANGES}]")
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_SPACE_PATTERN = re.compile(r"\s+")
+
+_jieba = None
+if settings.SEARCH_CJK_TOKENIZER == "jieba":
+    try:
+        import jieba as _jieba
+    except ImportError:
+        logger.warning("已配置使用 jieba 分词，但未安装 jieba 包，回退到二元切分。")
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """去除HTML标签并还原实体，得到纯文本。"""
+    if not value:
+        return ""
+    text = html.unescape(_TAG_PATTERN.sub(" ", value))
+    return _SPACE_PATTERN.sub(" ", text).strip()
+
+
+def _segment_cjk(run: str) -> List[str]:
+    """对连续的中日韩文字进行切分：优先使用 jieba 分词，否则使用重叠二元切分。"""
+    if _jieba is not None:
+        return [word for word in _jieba.cut_for_search(run) if word.strip()]
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    将文本切分为检索词。拉丁文字按单词切分并转为小写，中日韩文字单独切分。
+    索引与查询使用同一套规则，修改 SEARCH_CJK_TOKENIZER 后需要重建索引。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if _CJK_PATTERN.match(token):
+            tokens.extend(_segment_cjk(token))
+        else:
+            tokens.append(token.lower())
+    return tokens
+
+
+def segment(text: Optional[str]) -> str:
+    """把文本（可含HTML）转换为以空格分隔的检索词序列，供数据库全文索引使用。"""
+    return " ".join(tokenize(html_to_text(text)[:SEARCH_MAX_TEXT_LENGTH]))
+
+
+def query_terms(query: str) -> List[Tuple[str, bool]]:
+    """
+    将用户输入的关键词转换为查询词列表。
+
+    Returns:
+        (检索词, 是否前缀匹配) 组成的列表。单个汉字在二元切分的索引中需要前缀匹配。
+    """
+    terms = []
+    for token in dict.fromkeys(tokenize(query)):
+        terms.append((token, len(token) == 1 and bool(_CJK_PATTERN.match(token))))
+    return terms
+
+
+def highlight_terms(query: str) -> List[str]:
+    """
+    返回用于高亮的关键词，按长度降序排列以便优先匹配完整词语。
+    连续的中日韩文字在正文中可能不完整出现，因此同时加入其二元切分结果。
+    """
+    terms = set()
+    for match in _TOKEN_PATTERN.finditer(query):
+        run = match.group().lower()
+        terms.add(run)
+        if _CJK_PATTERN.match(run) and len(run) > 2:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return sorted(terms, key=len, reverse=True)
+
+
+def _best_window(text: str, matches: List[re.Match], length: int) -> int:
+    """选择包含不同关键词最多的片段起始位置。"""
+    best_start, best_score = 0, -1
+    for match in matches[:SNIPPET_MAX_MATCHES]:
+        # 让匹配位置大致处于片段的前三分之一处
+        start = max(0, min(match.start() - length // 3, len(text) - length))
+        end = start + length
+        score = len({m.group().lower() for m in matches if m.start() >= start and m.end() <= end})
+        if score > best_score:
+            best_start, best_score = start, score
+    return best_start
+
+
+def build_snippet(query: str, *sources: Optional[str], length: int = SNIPPET_LENGTH) -> str:
+    """
+    从第一个包含关键词的文本（可含HTML）中截取匹配最集中的片段，并用 <mark> 高亮关键词。
+    返回的片段已做HTML转义，可直接作为HTML渲染。没有任何匹配时返回第一个非空文本的开头部分。
+
+    Args:
+        query: 用户输入的搜索关键词。
+        sources: 按优先级排列的候选文本，如摘要、正文。
+        length: 片段的大致长度（字符）。
+    """
+    terms = highlight_terms(query)
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+
+    texts = [text for text in (html_to_text(source)[:SEARCH_MAX_TEXT_LENGTH] for source in sources) if text]
+    if not texts:
+        return ""
+
+    text, matches = texts[0], []
+    if pattern:
+        for candidate in texts:
+            found = list(pattern.finditer(candidate))
+            if found:
+                text, matches = candidate, found
+                break
+
+    start = _best_window(text, matches, length) if matches else 0
+    end = min(len(text), start + length)
+    fragment = text[start:end]
+
+    parts = []
+    position = 0
+    if pattern:
+        for match in pattern.finditer(fragment):
+            parts.append(html.escape(fragment[position:match.start()]))
+            parts.append(f"<mark>{html.escape(match.group())}</mark>")
+            position = match.end()
+    parts.append(html.escape(fragment[position:]))
+
+    snippet = "".join(parts)
+    if start > 0:
+        snippet = "... " + snippet
+    if end < len(text):
+        snippet += " ..."
+    return snippet
+
+
+class SearchBackend:
+    """全文索引后端的基类，不可用时由调用方退回到 LIKE 查询。"""
+
+    available = False
+
+    async def ensure_index(self) -> None:
+        """创建索引所需的表和索引（幂等）。"""
+
+    async def is_empty(self) -> bool:
+        """索引是否为空。"""
+        return False
+
+    async def index_articles(self, articles: Iterable[Article]) -> None:
+        """写入或更新文章的索引。"""
+
+    async def remove_articles(self, article_ids: List[int]) -> None:
+        """从索引中移除文章。"""
+
+    async def search(self, user_id: int, query: str, skip: int, limit: int, include_total: bool) -> Tuple[List[int], Optional[int]]:
+        """在用户订阅范围内按相关度检索，返回文章ID列表和匹配总数。"""
+        return [], 0
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    基于 tsvector + GIN 的全文索引。
+    预先切分好的检索词使用 'simple' 配置写入，标题、摘要、正文分别赋予 A/B/C 权重。
+    """
+
+    async def ensure_index(self) -> None:
+        await get_connection().execute_script(
+            """
+            CREATE TABLE IF NOT EXISTS "article_search" (
+                "article_id" INT PRIMARY KEY REFERENCES "articles" ("id") ON DELETE CASCADE,
+                "document" TSVECTOR NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS "idx_article_search_document" ON "article_search" USING GIN ("document");
+            """
+        )
+        self.available = True
+
+    async def is_empty(self) -> bool:
+        rows = await get_connection().execute_query_dict('SELECT 1 FROM "article_search" LIMIT 1')
+        return not rows
+
+    async def index_articles(self, articles: Iterable[Article]) -> None:
+        values = [
+            [article.id, segment(article.title), segment(article.summary), segment(article.content)]
+            for article in articles
+        ]
+        if not values:
+            return
+        await get_connection().execute_many(
+            """
+            INSERT INTO "article_search" ("article_id", "document")
+            VALUES ($1, setweight(to_tsvector('simple', $2), 'A')
+                     || setweight(to_tsvector('simple', $3), 'B')
+                     || setweight(to_tsvector('simple', $4), 'C'))
+            ON CONFLICT ("article_id") DO UPDATE SET "document" = EXCLUDED."document"
+            """,
+            values
+        )
+
+    async def remove_articles(self, article_ids: List[int]) -> None:
+        if article_ids:
+            await get_connection().execute_query('DELETE FROM "article_search" WHERE "article_id" = ANY($1)', [article_ids])
+
+    async def search(self, user_id: int, query: str, skip: int, limit: int, include_total: bool) -> Tuple[List[int], Optional[int]]:
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        # 检索词只包含文字字符，可安全拼入 tsquery 语法
+        tsquery = " & ".join(f"'{term}':*" if prefix else f"'{term}'" for term, prefix in terms)
+        where = """
+            FROM "article_search" s
+            JOIN "articles" a ON a."id" = s."article_id"
+            WHERE s."document" @@ to_tsquery('simple', $2)
+              AND a."feed_id" IN (SELECT "feed_id" FROM "user_feeds" WHERE "user_id" = $1)
+        """
+        connection = get_connection()
+        rows = await connection.execute_query_dict(
+            f"""
+            SELECT s."article_id" AS id
+            {where}
+            ORDER BY ts_rank(s."document", to_tsquery('simple', $2)) DESC, a."published_at" DESC, a."id" DESC
+            LIMIT $3 OFFSET $4
+            """,
+            [user_id, tsquery, limit, skip]
+        )
+        total = None
+        if include_total:
+            count_rows = await connection.execute_query_dict(f"SELECT COUNT(*) AS total {where}", [user_id, tsquery])
+            total = count_rows[0]["total"]
+        return [row["id"] for row in rows], total
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    基于 SQLite FTS5 的全文索引，rowid 与文章ID一致。
+    预先切分好的检索词以空格分隔写入，使用 bm25 排序并为标题、摘要赋予更高权重。
+    """
+
+    async def ensure_index(self) -> None:
+        try:
+            await get_connection().execute_script(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS "article_fts"
+                USING fts5("title", "summary", "content", tokenize = 'unicode61');
+                """
+            )
+            self.available = True
+        except Exception as e:
+            logger.warning(f"当前SQLite不支持FTS5，搜索将退回到LIKE查询: {e}")
+            self.available = False
+
+    async def is_empty(self) -> bool:
+        rows = await get_connection().execute_query_dict('SELECT 1 FROM "article_fts" LIMIT 1')
+        return not rows
+
+    async def index_articles(self, articles: Iterable[Article]) -> None:
+        values = [
+            [article.id, segment(article.title), segment(article.summary), segment(article.content)]
+            for article in articles
+        ]
+        if not values:
+            return
+        connection = get_connection()
+        await connection.execute_many('DELETE FROM "article_fts" WHERE "rowid" = ?', [[row[0]] for row in values])
+        await connection.execute_many(
+            'INSERT INTO "article_fts" ("rowid", "title", "summary", "content") VALUES (?, ?, ?, ?)', values
+        )
+
+    async def remove_articles(self, article_ids: List[int]) -> None:
+        if article_ids:
+            await get_connection().execute_many('DELETE FROM "article_fts" WHERE "rowid" = ?', [[i] for i in article_ids])
+
+    async def search(self, user_id: int, query: str, skip: int, limit: int, include_total: bool) -> Tuple[List[int], Optional[int]]:
+        terms = query_terms(query)
+        if not terms:
+            return [], 0
+        match = " ".join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms)
+        where = """
+            FROM "article_fts" f
+            JOIN "articles" a ON a."id" = f."rowid"
+            WHERE "article_fts" MATCH ?
+              AND a."feed_id" IN (SELECT "feed_id" FROM "user_feeds" WHERE "user_id" = ?)
+        """
+        connection = get_connection()
+        rows = await connection.execute_query_dict(
+            f"""
+            SELECT f."rowid" AS id
+            {where}
+            ORDER BY bm25("article_fts", 10.0, 4.0, 1.0), a."published_at" DESC, a."id" DESC
+            LIMIT ? OFFSET ?
+            """,
+            [match, user_id, limit, skip]
+        )
+        total = None
+        if include_total:
+            count_rows = await connection.execute_query_dict(f"SELECT COUNT(*) AS total {where}", [match, user_id])
+            total = count_rows[0]["total"]
+        return [row["id"] for row in rows], total
+
+
+_backend: Optional[SearchBackend] = None
+
+
+def get_search_backend() -> SearchBackend:
+    """根据 DB_TYPE 返回对应的全文索引后端（进程内单例）。"""
+    global _backend
+    if _backend is None:
+        _backend = PostgresSearchBackend() if is_postgres() else SqliteSearchBackend()
+    return _backend
+
+
+async def ensure_search_index() -> SearchBackend:
+    """
+    确保全文索引已创建，应在进程启动、数据库连接建立后调用。
+    """
+    backend = get_search_backend()
+    await backend.ensure_index()
+    return backend
+
+
+async def index_articles(articles: Iterable[Article]) -> None:
+    """
+    增量更新文章的全文索引。索引失败只记录日志，不影响文章入库。
+    """
+    backend = get_search_backend()
+    if not backend.available:
+        return
+    try:
+        await backend.index_articles(articles)
+    except Exception as e:
+        logger.exception(f"更新全文索引失败: {e}")
+
+
+async def rebuild_search_index() -> int:
+    """
+    按主键分批为全部文章重建全文索引。
+
+    Returns:
+        已索引的文章数量。
+    """
+    backend = await ensure_search_index()
+    if not backend.available:
+        return 0
+
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = await Article.filter(id__gt=last_id).order_by("id").limit(SEARCH_REBUILD_BATCH_SIZE)
+        if not batch:
+            break
+        await backend.index_articles(batch)
+        indexed += len(batch)
+        last_id = batch[-1].id
+        logger.info(f"全文索引重建进度：已处理 {indexed} 篇文章")
+    return indexed
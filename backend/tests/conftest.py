@@ -0,0 +1,92 @@
+import os
+
+# 必须在导入应用模块之前设置：测试使用SQLite，并避免 core.config 生成 .env 文件
+os.environ["DB_TYPE"] = "sqlite"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ["FEED_PARSER_PROCESSES"] = "0"
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from tortoise import Tortoise
+
+import core.http_client
+import core.redis
+from api import api_router
+from core.security import get_current_user
+from models import User
+from services.notification_service import new_articles_digest
+from services.search_service import ensure_search_index
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """每个测试使用独立的内存SQLite数据库，并创建全文索引表。"""
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["models"]})
+    await Tortoise.generate_schemas()
+    await ensure_search_index()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def redis():
+    """以内存中的 fakeredis 替换共享Redis客户端。"""
+    client = FakeAsyncRedis(decode_responses=True)
+    core.redis._redis = client
+    yield client
+    core.redis._redis = None
+    await client.aclose()
+
+
+@pytest.fixture
+async def feed_server():
+    """
+    以 MockTransport 替换共享HTTP客户端。返回 {url: 响应正文}，未登记的URL返回404。
+    """
+    documents = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = documents.get(str(request.url))
+        return httpx.Response(200, content=body) if body is not None else httpx.Response(404)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    core.http_client._client = client
+    yield documents
+    core.http_client._client = None
+    await client.aclose()
+
+
+@pytest.fixture
+def sent_digests(monkeypatch):
+    """记录新文章通知摘要，而不实际发送。"""
+    sent = []
+
+    async def add(feed_id, feed_title, count, user_ids):
+        sent.append((feed_id, count, set(user_ids)))
+
+    monkeypatch.setattr(new_articles_digest, "add", add)
+    return sent
+
+
+@pytest.fixture
+async def user(db):
+    return await User.create(email="reader@example.com", hashed_password="x")
+
+
+@pytest.fixture
+async def client(user, redis):
+    """以 user 身份调用API的客户端，不执行应用的 lifespan。"""
+    app = FastAPI()
+    app.include_router(api_router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
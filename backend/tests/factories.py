@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from models import User, Feed, UserFeed, Article
+
+
+async def create_feed(url: str = "https://example.com/feed.xml", **kwargs) -> Feed:
+    return await Feed.create(url=url, title=kwargs.pop("title", "Example"), **kwargs)
+
+
+async def subscribe(user: User, feed: Feed) -> UserFeed:
+    return await UserFeed.create(
+        user=user, feed=feed, unread_count=await Article.filter(feed_id=feed.id).count()
+    )
+
+
+async def create_articles(feed: Feed, count: int, age_days: int = 0) -> list:
+    """为Feed创建 count 篇文章，age_days 为入库天数。"""
+    articles = []
+    for index in range(count):
+        article = await Article.create(
+            feed=feed,
+            guid=f"{feed.id}-{age_days}-{index}",
+            title=f"Article {index}",
+            url=f"{feed.url}/{age_days}/{index}",
+            published_at=datetime.now(),
+        )
+        articles.append(article)
+    if age_days:
+        ids = [article.id for article in articles]
+        await Article.filter(id__in=ids).update(created_at=datetime.now() - timedelta(days=age_days))
+    return articles
+
+
+def build_rss(items: list, title: str = "Example Blog") -> bytes:
+    """
+    构造RSS文档。items 为 (guid, 标题) 列表，按从新到旧排列。
+    """
+    entries = "".join(
+        f"<item><guid>{guid}</guid><title>{item_title}</title>"
+        f"<link>https://example.com/posts/{guid}</link>"
+        f"<pubDate>Mon, {20 - index:02d} Jan 2025 08:00:00 GMT</pubDate></item>"
+        for index, (guid, item_title) in enumerate(items)
+    )
+    return (
+        f'<?xml version="1.0"?><rss version="2.0"><channel><title>{title}</title>'
+        f"<link>https://example.com</link><description>Posts about examples</description>"
+        f"{entries}</channel></rss>"
+    ).encode()
@@ -0,0 +1,116 @@
+import pytest
+
+import services.article_service as article_service
+from models import Article, UserArticle, UserFeed
+from services.article_service import mark_all_articles_as_read, update_article_status, update_articles_status_bulk
+from services.counter_service import add_unread_for_subscribers
+from tests.factories import create_articles, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_mark_all_as_read_updates_rows_and_counters(user, redis, monkeypatch):
+    # 分段较小，覆盖多段 upsert 的情况
+    monkeypatch.setattr(article_service, "MARK_READ_CHUNK_SIZE", 2)
+    feed = await create_feed()
+    other_feed = await create_feed("https://example.org/feed.xml")
+    articles = await create_articles(feed, 5)
+    await create_articles(other_feed, 2)
+    await subscribe(user, feed)
+    await subscribe(user, other_feed)
+    await update_article_status(articles[0].id, user.id, is_read=True)
+    await update_article_status(articles[1].id, user.id, is_favorite=True)
+
+    assert await mark_all_articles_as_read(user.id, feed_id=feed.id) == 4
+
+    states = await UserArticle.filter(user_id=user.id).values_list("article_id", "is_read", "is_favorite")
+    assert sorted(states) == sorted(
+        (article.id, True, article.id == articles[1].id) for article in articles
+    )
+    user_feed = await UserFeed.get(user_id=user.id, feed_id=feed.id)
+    assert (user_feed.unread_count, user_feed.favorite_count) == (0, 1)
+    assert (await UserFeed.get(user_id=user.id, feed_id=other_feed.id)).unread_count == 2
+
+    # 再次执行不会重复标记
+    assert await mark_all_articles_as_read(user.id, feed_id=feed.id) == 0
+
+
+async def test_mark_all_as_read_keeps_articles_ingested_meanwhile_unread(user, redis, monkeypatch):
+    feed = await create_feed()
+    await create_articles(feed, 3)
+    await subscribe(user, feed)
+    mark_range_as_read = article_service._mark_range_as_read
+
+    async def mark_then_ingest(*args):
+        article_ids = await mark_range_as_read(*args)
+        # 最后一段处理完之后，又有新文章入库
+        await create_articles(feed, 1, age_days=1)
+        await add_unread_for_subscribers(feed.id, 1)
+        return article_ids
+
+    monkeypatch.setattr(article_service, "_mark_range_as_read", mark_then_ingest)
+
+    assert await mark_all_articles_as_read(user.id) == 3
+    assert (await UserFeed.get(user_id=user.id, feed_id=feed.id)).unread_count == 1
+
+
+async def test_bulk_status_update_reports_not_found(client, user):
+    feed = await create_feed()
+    unsubscribed_feed = await create_feed("https://example.org/feed.xml")
+    articles = await create_articles(feed, 2)
+    [foreign] = await create_articles(unsubscribed_feed, 1)
+    await subscribe(user, feed)
+    missing_id = foreign.id + 100
+
+    response = await client.patch("/api/articles/status", json={"items": [
+        {"article_id": articles[0].id, "is_read": True},
+        {"article_id": articles[1].id, "is_favorite": True},
+        {"article_id": foreign.id, "is_read": True},
+        {"article_id": missing_id, "is_read": True},
+    ]})
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["updated"] == 2
+    assert sorted(result["not_found"]) == sorted([foreign.id, missing_id])
+    assert {item["article_id"] for item in result["items"]} == {articles[0].id, articles[1].id}
+    # 无权访问的文章不会创建交互记录
+    assert not await UserArticle.filter(article_id=foreign.id).exists()
+    user_feed = await UserFeed.get(user_id=user.id, feed_id=feed.id)
+    assert (user_feed.unread_count, user_feed.favorite_count) == (1, 1)
+
+
+async def test_bulk_status_update_keeps_concurrently_flushed_position(user, redis, monkeypatch):
+    feed = await create_feed()
+    [article] = await create_articles(feed, 1)
+    await subscribe(user, feed)
+    await UserArticle.create(user=user, article=article, read_position=100)
+    get_user_article_states = article_service.get_user_article_states
+
+    async def states_then_flush(*args):
+        states = await get_user_article_states(*args)
+        # 读取已有状态之后，阅读位置缓冲区写回了更新的位置
+        await UserArticle.filter(user_id=user.id, article_id=article.id).update(read_position=500)
+        return states
+
+    monkeypatch.setattr(article_service, "get_user_article_states", states_then_flush)
+
+    result = await update_articles_status_bulk(user.id, [{"article_id": article.id, "is_favorite": True}])
+
+    assert result["updated"] == 1
+    user_article = await UserArticle.get(user_id=user.id, article_id=article.id)
+    assert (user_article.is_favorite, user_article.read_position) == (True, 500)
+
+
+async def test_article_list_returns_excerpt_in_both_views(client, user):
+    feed = await create_feed()
+    [article] = await create_articles(feed, 1)
+    await Article.filter(id=article.id).update(summary="<p>Full summary</p>", excerpt="Full summary")
+    await subscribe(user, feed)
+
+    full = (await client.get("/api/articles")).json()["data"]
+    compact = (await client.get("/api/articles", params={"view": "list"})).json()["data"]
+
+    assert full[0]["excerpt"] == compact[0]["excerpt"] == "Full summary"
+    assert full[0]["summary"] == "<p>Full summary</p>"
+    assert "summary" not in compact[0]
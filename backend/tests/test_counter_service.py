@@ -0,0 +1,44 @@
+import pytest
+
+from models import UserFeed
+from services.article_service import update_article_status
+from services.counter_service import apply_counter_delta, recalculate_feed_counters
+from tests.factories import create_articles, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_counters(user, feed):
+    user_feed = await UserFeed.get(user_id=user.id, feed_id=feed.id)
+    return user_feed.unread_count, user_feed.favorite_count
+
+
+async def test_counters_follow_read_and_favorite_changes(user, redis):
+    feed = await create_feed()
+    articles = await create_articles(feed, 3)
+    await subscribe(user, feed)
+
+    await update_article_status(articles[0].id, user.id, is_read=True)
+    await update_article_status(articles[1].id, user.id, is_favorite=True)
+    assert await get_counters(user, feed) == (2, 1)
+
+    # 重复提交相同状态不会重复计数
+    await update_article_status(articles[0].id, user.id, is_read=True)
+    await update_article_status(articles[1].id, user.id, is_favorite=True)
+    assert await get_counters(user, feed) == (2, 1)
+
+    await update_article_status(articles[0].id, user.id, is_read=False)
+    await update_article_status(articles[1].id, user.id, is_favorite=False)
+    assert await get_counters(user, feed) == (3, 0)
+
+
+async def test_recalculate_feed_counters_fixes_drift(user, redis):
+    feed = await create_feed()
+    articles = await create_articles(feed, 4)
+    await subscribe(user, feed)
+    await update_article_status(articles[0].id, user.id, is_read=True, is_favorite=True)
+
+    await apply_counter_delta(user.id, feed.id, unread_delta=5, favorite_delta=-3)
+    await recalculate_feed_counters(user.id)
+
+    assert await get_counters(user, feed) == (3, 1)
@@ -0,0 +1,46 @@
+import pytest
+
+from services.feed_service import _mark_unchanged
+from tests.factories import create_feed, subscribe, create_articles
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_article_etag_changes_after_status_update(client, user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    [article] = await create_articles(feed, 1)
+    url = f"/api/articles/{article.id}"
+
+    # 首次查看会自动标记为已读，响应中的ETag已反映已读后的状态
+    first = await client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    cached = await client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    response = await client.patch(f"{url}/status", json={"is_favorite": True})
+    assert response.status_code == 200
+
+    refreshed = await client.get(url, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.json()["is_favorite"] is True
+
+
+async def test_feed_list_etag_changes_after_unchanged_fetch(client, user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+
+    first = await client.get("/api/feeds")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    # 内容未变化的抓取只更新 last_fetched 和调度字段
+    await _mark_unchanged(feed)
+
+    refreshed = await client.get("/api/feeds", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != etag
+    assert refreshed.json()[0]["feed_last_fetched"] is not None
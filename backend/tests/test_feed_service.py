@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from models import Article, Feed, UserArticle, UserFeed
+from services.feed_service import create_feed as subscribe_to_feed, fetch_and_save_articles
+from tests.factories import build_rss, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+FEED_URL = "https://example.com/feed.xml"
+
+
+async def test_new_feed_is_not_due_before_initial_fetch(user, redis):
+    feed = await subscribe_to_feed({"url": FEED_URL}, user.id)
+
+    assert feed.title == "处理中..."
+    assert feed.next_fetch_at > datetime.now()
+
+
+async def test_scheduled_fetch_of_unfetched_feed_applies_metadata(user, redis, feed_server, sent_digests):
+    feed = await create_feed(FEED_URL, title="处理中...")
+    await subscribe(user, feed)
+    feed_server[FEED_URL] = build_rss([("a", "First"), ("b", "Second")])
+
+    # 调度器抢在首次抓取任务之前处理了新Feed
+    created = await fetch_and_save_articles(feed)
+
+    assert len(created) == 2
+    feed = await Feed.get(id=feed.id)
+    assert feed.title == "Example Blog"
+    assert feed.description == "Posts about examples"
+    assert feed.website_url == "https://example.com"
+    # 历史文章不发送新文章通知
+    assert sent_digests == []
+
+
+async def test_reingesting_feed_creates_no_duplicates(user, redis, feed_server, sent_digests):
+    feed = await create_feed(FEED_URL)
+    await subscribe(user, feed)
+    feed_server[FEED_URL] = build_rss([("a", "First"), ("b", "Second")])
+    assert len(await fetch_and_save_articles(feed)) == 2
+
+    # 新文档包含一篇新文章和两篇已入库的文章
+    feed_server[FEED_URL] = build_rss([("c", "Third"), ("a", "First"), ("b", "Second")])
+    created = await fetch_and_save_articles(feed)
+    assert [article.guid for article in created] == ["c"]
+
+    # 清除内容哈希，强制重新解析同一份文档
+    feed.content_hash = None
+    assert await fetch_and_save_articles(feed) == []
+
+    assert sorted(await Article.filter(feed_id=feed.id).values_list("guid", flat=True)) == ["a", "b", "c"]
+    assert (await UserFeed.get(user_id=user.id, feed_id=feed.id)).unread_count == 3
+    assert sent_digests == [(feed.id, 1, {user.id})]
+
+
+async def test_new_articles_are_unread_without_interaction_rows(client, user, feed_server, sent_digests):
+    feed = await create_feed(FEED_URL)
+    await subscribe(user, feed)
+    feed_server[FEED_URL] = build_rss([("a", "First"), ("b", "Second")])
+    [first, second] = await fetch_and_save_articles(feed)
+
+    # 入库时不为订阅者写入交互记录
+    assert not await UserArticle.exists()
+
+    await client.patch(f"/api/articles/{first.id}/status", json={"is_read": True})
+    response = await client.get("/api/articles", params={"is_read": False})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["data"]] == [second.id]
+    assert await UserArticle.filter(user_id=user.id).count() == 1
+
+
+async def test_overlapping_fetches_count_each_article_once(user, redis, feed_server, sent_digests):
+    feed = await create_feed(FEED_URL, last_fetched=datetime.now())
+    await subscribe(user, feed)
+    feed_server[FEED_URL] = build_rss([("a", "First"), ("b", "Second")])
+
+    # 手动刷新与定时抓取同时处理同一个Feed
+    results = await asyncio.gather(
+        fetch_and_save_articles(await Feed.get(id=feed.id)),
+        fetch_and_save_articles(await Feed.get(id=feed.id)),
+    )
+
+    assert sorted(article.guid for created in results for article in created) == ["a", "b"]
+    assert (await UserFeed.get(user_id=user.id, feed_id=feed.id)).unread_count == 2
+    assert sum(count for _, count, _ in sent_digests) == 2
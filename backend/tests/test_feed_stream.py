@@ -0,0 +1,151 @@
+import httpx
+import pytest
+
+import services.feed_stream as feed_stream
+from core.config import settings
+from services.feed_parser import parse_feed, parse_feed_document, shutdown_parser_pool
+from services.feed_stream import read_capped_body, stream_feed_entries
+from tests.factories import build_rss
+
+pytestmark = pytest.mark.anyio
+
+GUIDS = ["a", "b", "c", "d", "e", "f"]
+
+
+def build_rss_feed(guids: list) -> bytes:
+    return build_rss([(guid, f"Post {guid}") for guid in guids])
+
+
+def build_atom(guids: list) -> bytes:
+    entries = "".join(
+        f"<entry><id>{guid}</id><title>Post {guid}</title>"
+        f'<link href="https://example.com/posts/{guid}"/>'
+        f"<updated>2025-01-{20 - index:02d}T08:00:00Z</updated>"
+        f"<published>2025-01-{20 - index:02d}T08:00:00Z</published></entry>"
+        for index, guid in enumerate(guids)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        '<title>Atom Blog</title><link href="https://example.com"/><id>urn:example</id>'
+        f"{entries}</feed>"
+    ).encode()
+
+
+def build_rdf(guids: list) -> bytes:
+    items = "".join(
+        f'<item rdf:about="https://example.com/posts/{guid}"><title>Post {guid}</title>'
+        f"<link>https://example.com/posts/{guid}</link></item>"
+        for guid in guids
+    )
+    return (
+        '<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+        'xmlns="http://purl.org/rss/1.0/"><channel rdf:about="https://example.com">'
+        "<title>RDF Blog</title><link>https://example.com</link><description>RSS 1.0</description></channel>"
+        f"{items}</rdf:RDF>"
+    ).encode()
+
+
+class ChunkedBody:
+    """按固定大小分块返回文档，并记录读取了多少块。"""
+
+    def __init__(self, document: bytes, size: int = 7):
+        self.chunks = [document[i:i + size] for i in range(0, len(document), size)]
+        self.sent = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+    @property
+    def exhausted(self) -> bool:
+        return self.sent == len(self.chunks)
+
+
+def stream(body: ChunkedBody, headers: dict = None) -> httpx.Response:
+    return httpx.Response(200, content=body, headers=headers)
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """每切分出一个条目就解析一次，便于验证提前停止。"""
+    monkeypatch.setattr(feed_stream, "STREAM_PARSE_BATCH_SIZE", 1)
+
+
+@pytest.mark.parametrize("build", [build_rss_feed, build_atom, build_rdf], ids=["rss", "atom", "rdf"])
+async def test_chunked_stream_matches_full_parse(build):
+    document = build(GUIDS)
+    body = ChunkedBody(document)
+
+    parsed = await stream_feed_entries(stream(body), known_guids=set())
+
+    expected = parse_feed_document(document)
+    assert body.exhausted
+    assert parsed["feed"] == expected["feed"]
+    assert parsed["entries"] == expected["entries"]
+    assert len(parsed["entries"]) == len(GUIDS)
+
+
+async def test_stream_stops_at_max_entries(small_batches, monkeypatch):
+    monkeypatch.setattr(settings, "FEED_MAX_ENTRIES", 3)
+    body = ChunkedBody(build_atom(GUIDS))
+
+    parsed = await stream_feed_entries(stream(body), known_guids=set())
+
+    assert [entry["guid"] for entry in parsed["entries"]] == ["a", "b", "c"]
+    assert not body.exhausted
+
+
+async def test_stream_stops_at_first_known_guid(small_batches):
+    body = ChunkedBody(build_rss_feed(GUIDS))
+
+    parsed = await stream_feed_entries(stream(body), known_guids={"c", "e"})
+
+    assert [entry["guid"] for entry in parsed["entries"]] == ["a", "b"]
+    assert not body.exhausted
+
+
+async def test_stream_keeps_entries_read_before_byte_cap(small_batches, monkeypatch):
+    document = build_rss_feed(GUIDS)
+    # 上限落在第四个条目开头附近：前三个条目已完整读取，第四个条目不完整
+    monkeypatch.setattr(settings, "FEED_MAX_BYTES", document.index(b"<item><guid>d</guid>") + 10)
+    body = ChunkedBody(document)
+
+    parsed = await stream_feed_entries(stream(body), known_guids=set())
+
+    assert [entry["guid"] for entry in parsed["entries"]] == ["a", "b", "c"]
+    assert not body.exhausted
+
+
+async def test_stream_falls_back_to_full_parse_for_non_strict_xml():
+    document = build_rss([("a", "Caf&eacute; &amp; Bar"), ("b", "Second")])
+    body = ChunkedBody(document)
+
+    parsed = await stream_feed_entries(stream(body), known_guids=set())
+
+    assert [(entry["guid"], entry["title"]) for entry in parsed["entries"]] == [("a", "Café & Bar"), ("b", "Second")]
+
+
+async def test_read_capped_body_enforces_limit():
+    document = build_rss_feed(GUIDS)
+
+    assert await read_capped_body(stream(ChunkedBody(document)), max_bytes=len(document)) == document
+    with pytest.raises(ValueError):
+        await read_capped_body(stream(ChunkedBody(document)), max_bytes=len(document) - 1)
+    # 声明的长度已超过上限时不读取响应体
+    body = ChunkedBody(document)
+    with pytest.raises(ValueError):
+        await read_capped_body(stream(body, {"content-length": str(len(document))}), max_bytes=100)
+    assert body.sent == 0
+
+
+async def test_process_pool_parse_matches_in_process_parse(monkeypatch):
+    monkeypatch.setattr(settings, "FEED_PARSER_PROCESSES", 1)
+    document = build_atom(GUIDS)
+    try:
+        parsed = await parse_feed(document, max_entries=4)
+    finally:
+        shutdown_parser_pool()
+
+    assert parsed == parse_feed_document(document, max_entries=4)
+    assert len(parsed["entries"]) == 4
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Article
+from services.article_service import encode_cursor, nulls_sort_first, query_user_articles
+from tests.factories import create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+BASE_TIME = datetime(2025, 1, 20, 8, 0, 0)
+# 每个发布时间（小时偏移，None 表示缺失）出现的次数，包含并列和NULL
+PUBLISHED_HOURS = [0, 1, 1, 1, None, 2, None, 3, 3, None]
+
+
+async def create_articles_published_at(feed, hours: list) -> list:
+    articles = []
+    for index, hour in enumerate(hours):
+        articles.append(await Article.create(
+            feed=feed,
+            guid=f"p{index}",
+            title=f"Article {index}",
+            url=f"{feed.url}/{index}",
+            published_at=None if hour is None else BASE_TIME + timedelta(hours=hour),
+        ))
+    return articles
+
+
+def expected_ids(articles: list, sort_order: str) -> list:
+    """按 (published_at, id) 排序，NULL的位置与数据库一致。"""
+    descending = sort_order == "desc"
+    dated = sorted(
+        (article for article in articles if article.published_at is not None),
+        key=lambda article: (article.published_at, article.id), reverse=descending,
+    )
+    undated = sorted((article for article in articles if article.published_at is None),
+                     key=lambda article: article.id, reverse=descending)
+    ordered = undated + dated if nulls_sort_first(sort_order) else dated + undated
+    return [article.id for article in ordered]
+
+
+async def walk_pages(user, limit: int, **kwargs) -> list:
+    """沿 next_cursor 翻完所有页，返回每页的文章ID。"""
+    pages, cursor = [], None
+    while True:
+        result, _, cursor = await query_user_articles(
+            user.id, limit=limit, cursor=cursor, include_total=False, **kwargs
+        )
+        pages.append([article["id"] for article in result])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("view", ["full", "list"])
+@pytest.mark.parametrize("sort_order", ["desc", "asc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 4])
+async def test_cursor_pages_cover_ties_and_nulls_exactly_once(user, sort_order, view, limit):
+    feed = await create_feed()
+    articles = await create_articles_published_at(feed, PUBLISHED_HOURS)
+    await subscribe(user, feed)
+
+    pages = await walk_pages(user, limit, sort_order=sort_order, view=view)
+
+    assert [article_id for page in pages for article_id in page] == expected_ids(articles, sort_order)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+@pytest.mark.parametrize("sort_order", ["desc", "asc"])
+async def test_cursor_pages_match_offset_pages(user, sort_order):
+    feed = await create_feed()
+    await create_articles_published_at(feed, PUBLISHED_HOURS)
+    await subscribe(user, feed)
+
+    offset_ids = []
+    for skip in range(0, len(PUBLISHED_HOURS), 3):
+        result, _, _ = await query_user_articles(user.id, skip=skip, limit=3, sort_order=sort_order)
+        offset_ids.extend(article["id"] for article in result)
+
+    pages = await walk_pages(user, 3, sort_order=sort_order)
+    assert [article_id for page in pages for article_id in page] == offset_ids
+
+
+async def test_ties_on_sort_value_are_ordered_by_id(user):
+    feed = await create_feed()
+    articles = await create_articles_published_at(feed, [5] * 5)
+    await subscribe(user, feed)
+    ids = [article.id for article in articles]
+
+    assert await walk_pages(user, 2) == [ids[:-3:-1], ids[-3:-5:-1], ids[:1]]
+    assert await walk_pages(user, 2, sort_order="asc") == [ids[:2], ids[2:4], ids[4:]]
+
+
+async def test_cursor_from_null_sort_value_continues_in_order(user):
+    feed = await create_feed()
+    articles = await create_articles_published_at(feed, PUBLISHED_HOURS)
+    await subscribe(user, feed)
+
+    for sort_order in ("desc", "asc"):
+        ordered = expected_ids(articles, sort_order)
+        for position, article_id in enumerate(ordered):
+            article = next(article for article in articles if article.id == article_id)
+            cursor = encode_cursor("published_at", article, sort_order)
+            result, _, _ = await query_user_articles(user.id, limit=len(ordered), cursor=cursor, sort_order=sort_order)
+            assert [item["id"] for item in result] == ordered[position + 1:]
+
+
+@pytest.mark.parametrize("count, sizes", [(4, [2, 2]), (5, [2, 2, 1])])
+async def test_last_page_has_no_more(client, user, count, sizes):
+    feed = await create_feed()
+    await create_articles_published_at(feed, list(range(count)))
+    await subscribe(user, feed)
+
+    pages, params = [], {"limit": 2, "with_total": False}
+    while True:
+        page = (await client.get("/api/articles", params=params)).json()
+        pages.append(page)
+        if not page["has_more"]:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    # 总数恰好是每页数量的整数倍时，最后一页是满页，不会再多出一个空页
+    assert [len(page["data"]) for page in pages] == sizes
+    assert all(page["next_cursor"] for page in pages[:-1])
+    assert pages[-1]["next_cursor"] is None
+
+
+async def test_cursor_rejected_for_other_sort_order(client, user):
+    feed = await create_feed()
+    await create_articles_published_at(feed, [0, 1, 2])
+    await subscribe(user, feed)
+
+    first = (await client.get("/api/articles", params={"limit": 1, "sort_order": "asc"})).json()
+    response = await client.get("/api/articles", params={"limit": 1, "cursor": first["next_cursor"]})
+
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+import pytest
+
+from core.config import settings
+from core.tasks import purge_user_task
+from models import User, UserArticle, UserFeed
+from services.article_service import update_article_status
+from services.purge_service import find_unfinished_purges
+from tests.factories import create_articles, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeArqRedis:
+    """记录任务内重新入队的任务。"""
+
+    def __init__(self):
+        self.jobs = []
+
+    async def enqueue_job(self, name, **kwargs):
+        self.jobs.append((name, kwargs))
+
+
+async def test_purge_user_task_requeues_until_finished(user, redis, monkeypatch):
+    feed = await create_feed()
+    articles = await create_articles(feed, 3)
+    await subscribe(user, feed)
+    for article in articles:
+        await update_article_status(article.id, user.id, is_read=True)
+    user.is_active = False
+    await user.save()
+    ctx = {"redis": FakeArqRedis()}
+
+    # 时间预算已用完：不删除用户，重新入队继续
+    monkeypatch.setattr(settings, "PURGE_TIME_BUDGET", -1)
+    await purge_user_task(ctx, user.id)
+    assert ctx["redis"].jobs == [("purge_user_task", {"user_id": user.id})]
+    assert await User.exists(id=user.id)
+
+    monkeypatch.setattr(settings, "PURGE_TIME_BUDGET", 240)
+    await purge_user_task(ctx, user.id)
+    assert len(ctx["redis"].jobs) == 1
+    assert not await User.exists(id=user.id)
+    assert not await UserArticle.exists()
+
+
+async def test_find_unfinished_purges(user, redis):
+    feed = await create_feed()
+    other_feed = await create_feed("https://example.org/feed.xml")
+    [article] = await create_articles(feed, 1)
+    [other_article] = await create_articles(other_feed, 1)
+    await subscribe(user, feed)
+    await subscribe(user, other_feed)
+    await update_article_status(article.id, user.id, is_favorite=True)
+    await update_article_status(other_article.id, user.id, is_favorite=True)
+    # 取消订阅后清理任务未能执行
+    await UserFeed.filter(user_id=user.id, feed_id=other_feed.id).delete()
+    deactivated = await User.create(email="gone@example.com", hashed_password="x", is_active=False)
+
+    user_ids, subscriptions = await find_unfinished_purges()
+
+    assert user_ids == [deactivated.id]
+    assert subscriptions == [(user.id, other_feed.id)]
@@ -0,0 +1,74 @@
+import pytest
+
+import services.read_position_service as read_position_service
+from models import User, UserArticle, UserFeed
+from services.purge_service import purge_user
+from services.read_position_service import (
+    FLUSHING_KEY,
+    PENDING_KEY,
+    buffer_read_positions,
+    flush_read_positions,
+    get_buffered_read_position,
+)
+from tests.factories import create_articles, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_overlapping_flush_keeps_new_positions(user, redis, monkeypatch):
+    feed = await create_feed()
+    [article] = await create_articles(feed, 1)
+    await subscribe(user, feed)
+    await buffer_read_positions(user.id, {article.id: 100})
+
+    write_positions = read_position_service._write_positions
+    overlapping = []
+
+    async def slow_write(positions):
+        written = await write_positions(positions)
+        if not overlapping:
+            # 第一次写回尚未结束时，用户继续阅读，下一次定时写回开始执行
+            await buffer_read_positions(user.id, {article.id: 200})
+            overlapping.append(await flush_read_positions())
+        return written
+
+    monkeypatch.setattr(read_position_service, "_write_positions", slow_write)
+
+    assert await flush_read_positions() == 1
+    assert overlapping == [0]
+    assert await flush_read_positions() == 1
+
+    user_article = await UserArticle.get(user_id=user.id, article_id=article.id)
+    assert user_article.read_position == 200
+
+
+async def test_flush_skips_positions_of_deleted_users(user, redis):
+    feed = await create_feed()
+    [article] = await create_articles(feed, 1)
+    await subscribe(user, feed)
+    other = await User.create(email="gone@example.com", hashed_password="x")
+    await subscribe(other, feed)
+    await buffer_read_positions(user.id, {article.id: 100})
+    await buffer_read_positions(other.id, {article.id: 300})
+    # 用户在位置写回之前被删除
+    await UserFeed.filter(user_id=other.id).delete()
+    await other.delete()
+
+    assert await flush_read_positions() == 1
+    assert not await redis.exists(PENDING_KEY, FLUSHING_KEY)
+    assert (await UserArticle.get(user_id=user.id, article_id=article.id)).read_position == 100
+
+
+async def test_purge_user_discards_buffered_positions(user, redis):
+    feed = await create_feed()
+    [article] = await create_articles(feed, 1)
+    await subscribe(user, feed)
+    other = await User.create(email="gone@example.com", hashed_password="x", is_active=False)
+    await subscribe(other, feed)
+    await buffer_read_positions(user.id, {article.id: 100})
+    await buffer_read_positions(other.id, {article.id: 300})
+
+    assert await purge_user(other.id)
+
+    assert await get_buffered_read_position(other.id, article.id) is None
+    assert await get_buffered_read_position(user.id, article.id) == 100
@@ -0,0 +1,51 @@
+import pytest
+
+from core.config import settings
+from models import Article, UserFeed
+from services.article_service import update_article_status
+from services.retention_service import apply_feed_retention
+from tests.factories import create_articles, create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+async def remaining_ids(feed):
+    return sorted(await Article.filter(feed_id=feed.id).values_list("id", flat=True))
+
+
+async def test_retention_keeps_protected_and_newest_articles(user, redis, monkeypatch):
+    monkeypatch.setattr(settings, "ARTICLE_RETENTION_MIN_ITEMS", 3)
+    feed = await create_feed(retention_days=30)
+    old = await create_articles(feed, 6, age_days=60)
+    recent = await create_articles(feed, 1)
+    await subscribe(user, feed)
+    await update_article_status(old[0].id, user.id, is_favorite=True)
+    await update_article_status(old[1].id, user.id, read_later=True)
+    await update_article_status(old[2].id, user.id, is_read=True)
+
+    assert await apply_feed_retention(feed) == 2
+
+    # 收藏、稍后读以及最新的 3 篇文章即使过期也会保留
+    assert await remaining_ids(feed) == sorted([old[0].id, old[1].id, old[4].id, old[5].id, recent[0].id])
+    user_feed = await UserFeed.get(user_id=user.id, feed_id=feed.id)
+    assert (user_feed.unread_count, user_feed.favorite_count) == (5, 1)
+
+
+async def test_retention_skips_feed_below_minimum_items(user, redis, monkeypatch):
+    monkeypatch.setattr(settings, "ARTICLE_RETENTION_MIN_ITEMS", 5)
+    feed = await create_feed(retention_days=30)
+    old = await create_articles(feed, 3, age_days=60)
+
+    assert await apply_feed_retention(feed) == 0
+    assert await remaining_ids(feed) == [article.id for article in old]
+
+
+async def test_retention_limits_article_count(user, redis, monkeypatch):
+    monkeypatch.setattr(settings, "ARTICLE_RETENTION_MIN_ITEMS", 0)
+    feed = await create_feed(retention_days=0, retention_max_items=2)
+    articles = await create_articles(feed, 4)
+    await subscribe(user, feed)
+
+    assert await apply_feed_retention(feed) == 2
+    assert await remaining_ids(feed) == [articles[2].id, articles[3].id]
+    assert (await UserFeed.get(user_id=user.id, feed_id=feed.id)).unread_count == 2
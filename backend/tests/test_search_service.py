@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.config import settings
+from db.sql import get_connection
+from models import Article
+from services.article_service import search_user_articles
+from services.retention_service import apply_feed_retention
+from services.search_service import get_search_backend, index_articles, query_terms, tokenize
+from tests.factories import create_feed, subscribe
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_article(feed, guid, title, summary=None, content=None, age_hours=0):
+    article = await Article.create(
+        feed=feed,
+        guid=guid,
+        title=title,
+        url=f"{feed.url}/{guid}",
+        summary=summary,
+        content=content,
+        excerpt=summary[:50] if summary else None,
+        published_at=datetime.now() - timedelta(hours=age_hours),
+    )
+    await index_articles([article])
+    return article
+
+
+async def search_ids(user, query, **kwargs):
+    results, _, _ = await search_user_articles(user.id, query, **kwargs)
+    return [result["id"] for result in results]
+
+
+async def test_search_results_omit_summary_and_content(user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    body = "<p>" + "A long article body about asynchronous databases. " * 50 + "</p>"
+    article = await create_article(feed, "a", "Async databases", summary=body, content=body)
+
+    [result], total, _ = await search_user_articles(user.id, "databases")
+
+    assert total == 1
+    assert result["id"] == article.id
+    assert result["summary"] is None
+    assert result["content"] is None
+    assert result["excerpt"] == article.excerpt
+    assert "<mark>databases</mark>" in result["snippet"]
+
+
+def test_tokenize_splits_cjk_into_bigrams():
+    assert tokenize("Hello, 世界和平!") == ["hello", "世界", "界和", "和平"]
+    assert tokenize("中 RSS") == ["中", "rss"]
+    # 单个汉字在二元切分的索引中需要前缀匹配
+    assert query_terms("中") == [("中", True)]
+    assert query_terms("数据库 Python python") == [("数据", False), ("据库", False), ("python", False)]
+
+
+async def test_search_matches_cjk_text(user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    article = await create_article(feed, "a", "数据库性能优化", summary="<p>介绍索引和查询计划</p>")
+    await create_article(feed, "b", "前端构建工具", summary="<p>打包与压缩</p>")
+    # 使用全文索引而不是退回到LIKE查询
+    assert get_search_backend().available
+
+    assert await search_ids(user, "性能") == [article.id]
+    assert await search_ids(user, "查询计划") == [article.id]
+    assert await search_ids(user, "库") == [article.id]
+    # 二元切分后每个检索词都必须出现
+    assert await search_ids(user, "性能压缩") == []
+
+
+async def test_search_matches_latin_words_case_insensitively(user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    article = await create_article(feed, "a", "Scaling PostgreSQL", content="<p>Connection pooling with PgBouncer</p>")
+    await create_article(feed, "b", "Scaling Redis", content="<p>Cluster mode</p>")
+
+    assert await search_ids(user, "postgresql") == [article.id]
+    assert await search_ids(user, "SCALING pgbouncer") == [article.id]
+    assert await search_ids(user, "kafka") == []
+
+
+async def test_search_ranks_title_matches_first(user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    # 正文匹配的文章发布时间更新，但标题匹配的权重更高
+    body_match = await create_article(feed, "a", "Weekly notes", content="<p>Some thoughts about python.</p>")
+    title_match = await create_article(feed, "b", "Python packaging", content="<p>Wheels</p>", age_hours=48)
+
+    assert await search_ids(user, "python") == [title_match.id, body_match.id]
+
+
+async def test_search_only_returns_subscribed_articles(user):
+    feed = await create_feed()
+    other_feed = await create_feed("https://example.org/feed.xml")
+    await subscribe(user, feed)
+    article = await create_article(feed, "a", "Shared topic")
+    await create_article(other_feed, "b", "Shared topic")
+
+    assert await search_ids(user, "topic") == [article.id]
+
+
+async def test_search_offset_cursor_pages_through_results(user):
+    feed = await create_feed()
+    await subscribe(user, feed)
+    articles = [await create_article(feed, f"p{i}", f"Release {i}", age_hours=i) for i in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        results, total, cursor = await search_user_articles(user.id, "release", limit=2, cursor=cursor)
+        seen.extend(result["id"] for result in results)
+        assert total == 5
+        if cursor is None:
+            break
+
+    assert len(results) == 1
+    # 相关度相同时按发布时间倒序
+    assert seen == [article.id for article in articles]
+
+
+async def test_retention_removes_deleted_articles_from_index(user, redis, monkeypatch):
+    monkeypatch.setattr(settings, "ARTICLE_RETENTION_MIN_ITEMS", 0)
+    feed = await create_feed(retention_days=0, retention_max_items=1)
+    await subscribe(user, feed)
+    old = await create_article(feed, "a", "Archived changelog")
+    new = await create_article(feed, "b", "Current changelog")
+
+    assert await apply_feed_retention(feed) == 1
+
+    assert await search_ids(user, "changelog") == [new.id]
+    rows = await get_connection().execute_query_dict(
+        'SELECT "rowid" FROM "article_fts" WHERE "rowid" = ?', [old.id]
+    )
+    assert rows == []
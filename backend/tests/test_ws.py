@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from api.ws import ClientConnection, ConnectionManager
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowWebSocket:
+    """发送需要等待的WebSocket，记录是否出现并发发送。"""
+
+    def __init__(self):
+        self.sent = []
+        self.sending = False
+        self.overlapped = False
+        self.closed_with = None
+
+    async def send_json(self, message):
+        if self.sending:
+            self.overlapped = True
+        self.sending = True
+        try:
+            await asyncio.sleep(0.01)
+            self.sent.append(message)
+        finally:
+            self.sending = False
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+async def test_close_with_message_waits_for_writer():
+    websocket = SlowWebSocket()
+    connection = ClientConnection(websocket, user_id=1, conn_id="c1")
+    connection.start(lambda conn: None)
+    connection.enqueue({"type": "new_articles"})
+    # 让写入任务开始发送队列中的消息
+    await asyncio.sleep(0)
+
+    await connection.close_with_message({"type": "error"})
+
+    assert not websocket.overlapped
+    assert websocket.sent[-1] == {"type": "error"}
+    assert websocket.closed_with is not None
+
+
+class BrokenWebSocket(SlowWebSocket):
+    async def send_json(self, message):
+        raise ValueError("unserializable message")
+
+
+async def test_writer_error_closes_and_unregisters_connection():
+    manager = ConnectionManager()
+    websocket = BrokenWebSocket()
+    websocket.accept = lambda: asyncio.sleep(0)
+    connection = await manager.connect(websocket, user_id=1, conn_id="c1")
+
+    connection.enqueue({"type": "new_articles"})
+    await asyncio.wait_for(connection.writer, timeout=1)
+
+    assert connection.closed
+    assert websocket.closed_with is not None
+    assert manager.active_connections == {}
+
+
+async def test_close_keeps_reference_to_close_task():
+    websocket = SlowWebSocket()
+    connection = ClientConnection(websocket, user_id=1, conn_id="c1")
+    connection.start(lambda conn: None)
+
+    connection.close()
+    await connection.closer
+
+    assert websocket.closed_with is not None
@@ -11,6 +11,8 @@ export interface Article {
   author: string | null;
   summary: string | null;
   content: string | null;
+  excerpt?: string | null; // 服务端生成的纯文本摘录，列表模式下代替摘要和正文
+  snippet?: string | null; // 搜索结果中由服务端生成的高亮片段
   image_url: string | null;
   published_at: string | null;
   guid: string | null;
@@ -74,9 +76,12 @@ export const useArticleStore = defineStore('article', () => {
 
     const preferencesStore = usePreferencesStore();
     // 如果没有传入排序参数，则使用用户设置的默认排序
+    const sort = params.sort || preferencesStore.preferences.default_sorting || 'newest';
     const finalParams = {
       ...params,
-      sort: params.sort || preferencesStore.preferences.default_sorting || 'newest'
+      sort,
+      sort_order: sort === 'oldest' ? 'asc' : 'desc', // 后端按 sort_order 决定排序方向
+      view: 'list' // 列表只需要标题、摘录和图片，正文在打开文章时再获取
     };
 
     // 如果已经有一个请求在进行中，等待它完成
@@ -214,7 +219,8 @@ export const useArticleStore = defineStore('article', () => {
     // 1. 尝试从本地缓存（搜索结果或文章列表）中查找文章
     const cachedArticle = searchResults.value.find(a => a.id === articleId) || articles.value.find(a => a.id === articleId);
 
-    if (cachedArticle) {
+    // 列表和搜索结果不包含正文，只有已加载过正文的文章才能直接使用缓存
+    if (cachedArticle && cachedArticle.content) {
       currentArticle.value = cachedArticle;
       // 标记为已读（如果尚未标记）
       if (!cachedArticle.is_read) {
@@ -411,9 +417,9 @@ export const useArticleStore = defineStore('article', () => {
     try {
       // 并发请求，提高效率
       const [favoritesResponse, readLaterResponse, unreadResponse] = await Promise.all([
-        api.get('/articles', { params: { is_favorite: true, limit: 1 } }),
-        api.get('/articles', { params: { read_later: true, limit: 1 } }),
-        api.get('/articles', { params: { is_read: false, limit: 1 } }),
+        api.get('/articles', { params: { is_favorite: true, limit: 1, fields: 'id' } }),
+        api.get('/articles', { params: { read_later: true, limit: 1, fields: 'id' } }),
+        api.get('/articles', { params: { is_read: false, limit: 1, fields: 'id' } }),
       ]);
 
       if (favoritesResponse.data && 'total' in favoritesResponse.data) {
@@ -58,27 +58,38 @@ export function connect() {
         articleStore.invalidateCacheForFeed(data.feed_id); // 使该feed的文章缓存失效
         break;
 
-      case 'new_articles':
+      case 'new_articles': {
+        // 服务端会把短时间内的多条通知合并为一条摘要，feeds 中包含每个订阅源的新文章数
+        const feeds: { feed_id: number; feed_title?: string; count: number }[] =
+          data.feeds ?? (data.feed_id ? [{ feed_id: data.feed_id, count: data.count }] : []);
+
         notification.info(data.message);
-        // 如果有新文章，增加对应feed的未读计数
-        if (data.feed_id && data.count > 0) {
-          unreadStore.incrementUnreadCount(data.feed_id, data.count);
+        for (const item of feeds) {
+          // 如果有新文章，增加对应feed的未读计数
+          if (item.count > 0) {
+            unreadStore.incrementUnreadCount(item.feed_id, item.count);
+          }
+          articleStore.invalidateCacheForFeed(item.feed_id); // 使该feed的文章缓存失效
         }
-        articleStore.invalidateCacheForFeed(data.feed_id); // 使该feed的文章缓存失效
 
         // 检查是否需要发送通知
         const preferencesStore = usePreferencesStore();
-        if (preferencesStore.preferences.notifications_enabled) {
-          // 确保订阅源列表已加载
-          if (feedStore.feeds.length === 0) {
-            await feedStore.fetchFeeds();
+        if (preferencesStore.preferences.notifications_enabled && feeds.length > 0) {
+          if (feeds.length > 1) {
+            notification.info(`${feeds.length} 个订阅源共有 ${data.count} 篇新文章`);
+          } else {
+            // 确保订阅源列表已加载
+            if (feedStore.feeds.length === 0) {
+              await feedStore.fetchFeeds();
+            }
+            const feed = feedStore.feeds.find(f => f.feed_id === feeds[0].feed_id);
+            const feedTitle = feed ? (feed.title_override || feed.feed_title) : '一个订阅源';
+
+            notification.info(`"${feedTitle}" 有 ${feeds[0].count} 篇新文章`);
           }
-          const feed = feedStore.feeds.find(f => f.feed_id === data.feed_id);
-          const feedTitle = feed ? (feed.title_override || feed.feed_title) : '一个订阅源';
-
-          notification.info(`"${feedTitle}" 有 ${data.count} 篇新文章`);
         }
         break;
+      }
 
       case 'error':
         notification.error(data.message);